@@ -1,172 +1,145 @@
 import tkinter as tk
 from tkinter import messagebox
 from PIL import Image, ImageTk
-from simpleai.search import SearchProblem, astar, breadth_first, depth_first, greedy, backtrack, uniform_cost, iterative_limited_depth_first
+import copy
+import os
+import sys
+import threading
 import time
-from queue import PriorityQueue
+from level import LEVEL_PATH, Level, open_levels
+from solver import SearchCancelled, solve
+from cache import CACHE_PATH, SolutionCache, solution_key
+from verify import compress_solution
 
 # Kích thước mỗi ô trên level
 TILE_SIZE = 45
 
-# Path to assets và levels
+# Ảnh (nền, phía trên) của từng loại ô
+TILE_IMAGES = {
+    "#": ("wall", None),                # Wall
+    " ": ("ground", None),              # Ground
+    "@": ("ground", "player"),          # Player
+    "+": ("target", "player"),          # Player on target
+    "$": ("ground", "box"),             # Box
+    ".": ("ground", "target"),          # Target
+    "*": ("target", "box_on_target"),   # Box on target
+}
+
+# Thời gian giữa hai bước khi replay lời giải (ms)
+REPLAY_DELAY = 80
+
+# Path to assets
 ASSET_PATH = "../assets/"
-LEVEL_PATH = "../Sokoban/levels/"
+
+# Ảnh đã scale được lưu lại ở đây (theo kích thước), lần chạy sau không phải decode/resize lại
+SPRITE_CACHE = os.path.join(os.path.dirname(CACHE_PATH), "sprites")
+
+# Thứ tự các sprite trong atlas
+SPRITES = ("wall", "box", "box_on_target", "ground", "player", "target")
+
+# Vị trí grid của level trên canvas chính
+GAME_X = 220
+GAME_Y = 50
+
+
+# File cache còn dùng được nếu mới hơn mọi file nguồn
+def is_fresh(path, sources):
+    if not os.path.exists(path):
+        return False
+    return os.path.getmtime(path) >= max(os.path.getmtime(source) for source in sources)
+
+
+# Lưu ảnh vào cache (ghi file tạm rồi đổi tên, tránh để lại file hỏng)
+def save_cached(image, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = f"{path}.{os.getpid()}.tmp"
+    image.save(temp, "PNG", compress_level=1)
+    os.replace(temp, path)
+
 
 # Manage assets
 class AssetManager:
-    def __init__(self):
+    def __init__(self, tile_size=TILE_SIZE):
+        self.tile_size = tile_size
         self.assets = self.load_assets()
 
+    # Mọi sprite đã scale ghép thành một ảnh ngang (atlas), cache trên đĩa theo kích thước ô
+    def load_atlas(self):
+        size = self.tile_size
+        path = os.path.join(SPRITE_CACHE, f"atlas_{size}.png")
+        sources = [ASSET_PATH + name + ".png" for name in SPRITES]
+        if is_fresh(path, sources):
+            return Image.open(path)
+        atlas = Image.new("RGBA", (size * len(SPRITES), size))
+        for i, source in enumerate(sources):
+            atlas.paste(Image.open(source).convert("RGBA").resize((size, size)), (i * size, 0))
+        save_cached(atlas, path)
+        return atlas
+
     def load_assets(self):
+        atlas = self.load_atlas()
+        size = self.tile_size
         return {
-            "wall": ImageTk.PhotoImage(Image.open(ASSET_PATH + "wall.png").resize((TILE_SIZE, TILE_SIZE))),
-            "box": ImageTk.PhotoImage(Image.open(ASSET_PATH + "box.png").resize((TILE_SIZE, TILE_SIZE))),
-            "box_on_target": ImageTk.PhotoImage(
-                Image.open(ASSET_PATH + "box_on_target.png").resize((TILE_SIZE, TILE_SIZE))
-            ),
-            "ground": ImageTk.PhotoImage(Image.open(ASSET_PATH + "ground.png").resize((TILE_SIZE, TILE_SIZE))),
-            "player": ImageTk.PhotoImage(Image.open(ASSET_PATH + "player.png").resize((TILE_SIZE, TILE_SIZE))),
-            "target": ImageTk.PhotoImage(Image.open(ASSET_PATH + "target.png").resize((TILE_SIZE, TILE_SIZE))),
+            name: ImageTk.PhotoImage(atlas.crop((i * size, 0, (i + 1) * size, size)))
+            for i, name in enumerate(SPRITES)
         }
 
-# Manage levels
-class Level:
-    def __init__(self, level_number):
-        self.number = level_number
-        self.data = self.load_level(f"level{level_number}.txt")
-
-    def load_level(self, level_number):
-        with open(LEVEL_PATH + level_number, "r") as file:
-            level_data = file.readlines()
-        # Loại bỏ ký tự xuống dòng và giữ nguyên khoảng trắng
-        return [list(line.rstrip('\n')) for line in level_data]
-
 # Render interface like background and game zone
 class GameCanvas:
     def __init__(self, root, width, height):
         self.canvas = tk.Canvas(root, width=width, height=height)
         self.canvas.pack(fill="both", expand=True)
+        self.cells = {}
 
+    # Ảnh nền đã resize theo kích thước canvas được cache lại như atlas
     def draw_background(self, image_path):
-        bg_image = Image.open(image_path).resize((self.canvas.winfo_reqwidth(), self.canvas.winfo_reqheight()), Image.LANCZOS)
-        
+        width, height = self.canvas.winfo_reqwidth(), self.canvas.winfo_reqheight()
+        name = os.path.splitext(os.path.basename(image_path))[0]
+        path = os.path.join(SPRITE_CACHE, f"{name}_{width}x{height}.png")
+        if is_fresh(path, [image_path]):
+            bg_image = Image.open(path)
+        else:
+            bg_image = Image.open(image_path).resize((width, height), Image.LANCZOS)
+            save_cached(bg_image, path)
+
         self.bg_image = ImageTk.PhotoImage(bg_image)
         self.canvas.create_image(0, 0, image=self.bg_image, anchor="nw")
 
+    # Mỗi ô có 2 item cố định: nền (wall/ground/target) và vật phía trên (player/box/...)
+    # draw_level tạo chúng một lần, sau đó chỉ đổi ảnh của các ô thay đổi (update_cells).
+    # Khi đổi level, item của các ô vẫn còn trong grid mới được dùng lại, chỉ ô thừa bị xoá
     def draw_level(self, level, assets):
+        old_cells = self.cells
+        self.cells = {}
         for y, row in enumerate(level.data):
             for x, tile in enumerate(row):
-                if tile == "#":     # Wall
-                    self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, image=assets["wall"], anchor=tk.NW)
-                elif tile == " ":   # Ground
-                    self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, image=assets["ground"], anchor=tk.NW)
-                elif tile == "@":   # Player
-                    self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, image=assets["ground"], anchor=tk.NW)
-                    self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, image=assets["player"], anchor=tk.NW)
-                elif tile == "$":   # Box
-                    self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, image=assets["ground"], anchor=tk.NW)
-                    self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, image=assets["box"], anchor=tk.NW)
-                elif tile == ".":   # Target
-                    self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, image=assets["ground"], anchor=tk.NW)
-                    self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, image=assets["target"], anchor=tk.NW)
-                elif tile == "*":   # Box on target
-                    self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, image=assets["target"], anchor=tk.NW)
-                    self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, image=assets["box_on_target"], anchor=tk.NW)
-
-class SokobanProblem(SearchProblem):
-    def __init__(self, level):
-        self.level = level
-        self.initial_state = self.get_initial_state()
-        self.goal = self.get_targets_positions()
-        super(SokobanProblem, self).__init__(initial_state = self.initial_state)
-
-    def get_initial_state(self):
-        player = None
-        boxes = []
-        for x, row in enumerate(self.level.data):
-            for y, cell in enumerate(row):
-                if cell == "@":
-                    player = (x, y)
-                elif cell == "$" or cell == "*":
-                    boxes.append((x, y))
-        return (player, tuple(boxes))
-
-    def get_targets_positions(self):
-        targets = []
-        for i, row in enumerate(self.level.data):
-            for j, tile in enumerate(row):
-                if tile == ".":
-                    targets.append((i, j))
-        return tuple(targets) 
-    
-    def canMove(self, x, y):
-        if self.level.data[x][y] not in ["#"]:
-            return True
-    
-    def is_deadlock(self, box_x, box_y):
-        if (self.level.data[box_x-1][box_y] in ['#'] and self.level.data[box_x][box_y-1] in ['#']) or \
-            (self.level.data[box_x-1][box_y] in ['#'] and self.level.data[box_x][box_y+1] in ['#']) or \
-            (self.level.data[box_x+1][box_y] in ['#'] and self.level.data[box_x][box_y-1] in ['#']) or \
-            (self.level.data[box_x+1][box_y] in ['#'] and self.level.data[box_x][box_y+1] in ['#']):
-            return True
-        return False
-    
-    def is_goal(self, state):
-        _, boxes = state
-        return set(boxes) == set(self.goal)  # Kiểm tra nếu các box trùng với các targets
+                items = old_cells.pop((y, x), None)
+                if items is None:
+                    base = self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, anchor=tk.NW)
+                    top = self.canvas.create_image(x * TILE_SIZE, y * TILE_SIZE, anchor=tk.NW)
+                    items = (base, top)
+                self.cells[(y, x)] = items
+                self.draw_cell(y, x, tile, assets)
+        for base, top in old_cells.values():
+            self.canvas.delete(base, top)
+
+    def draw_cell(self, row, col, tile, assets):
+        base, top = self.cells[(row, col)]
+        base_image, top_image = TILE_IMAGES.get(tile, (None, None))
+        self.canvas.itemconfigure(base, image=assets[base_image] if base_image else "")
+        if top_image:
+            self.canvas.itemconfigure(top, image=assets[top_image], state=tk.NORMAL)
+        else:
+            self.canvas.itemconfigure(top, state=tk.HIDDEN)
 
-    def update_valid_move(self, state, dx, dy):
-        player, boxes = state
-        cur_x, cur_y = player
-        next_x, next_y = cur_x + dx, cur_y + dy
-        # Kiểm tra nếu vị trí mới hợp lệ (không đụng wall)
-        if self.level.data[next_x][next_y] not in ["#"] and (next_x, next_y) not in boxes: # Không đẩy box
-            return ((next_x, next_y), boxes)
-        elif (next_x, next_y) in boxes:  # Nếu vị trí là box
-            new_box_x, new_box_y = next_x + dx, next_y + dy
+    # Chỉ vẽ lại các ô (row, col) bị thay đổi sau một bước đi
+    def update_cells(self, level, assets, cells):
+        for row, col in cells:
+            if (row, col) in self.cells:
+                self.draw_cell(row, col, level.data[row][col], assets)
 
-            # Kiểm tra nếu box có thể đẩy được
-            if self.level.data[new_box_x][new_box_y] not in ["#"] and (new_box_x, new_box_y) not in boxes and not self.is_deadlock(new_box_x, new_box_y):
-                new_boxes = list(boxes)
-                new_boxes.append((new_box_x, new_box_y))
-                new_boxes.remove((next_x, next_y))  
-                return ((next_x, next_y), tuple(new_boxes))
-            else:
-                return (player, boxes)    
-        else:
-            return (player, boxes)
-
-    # Các hành động mà player có thể thực hiện
-    def actions(self, state):
-        old_state = state
-        moves = {"U": (-1, 0), "D": (1, 0), "L": (0, -1), "R": (0, 1)}
-        actions = []
-        for action, (dx, dy) in moves.items():
-            new_state = self.update_valid_move(state, dx, dy)
-            if new_state != old_state:
-                actions.append(action)
-        return actions
-    
-    def result(self, state, action):
-        dx, dy = {"U": (-1, 0), "D": (1, 0), "L": (0, -1), "R": (0, 1)}[action]
-        new_state = self.update_valid_move(state, dx, dy)
-        return new_state
-       
-    def cost(self, state, action, state2):
-        return 1
-
-    def heuristic(self, state):
-        player, boxes = state
-            
-        total_distance = 0
-        for box in tuple(boxes):
-            distances = [abs(box[0] - goal[0]) + abs(box[1] - goal[1]) for goal in self.goal]
-            total_distance += min(distances)
-        return total_distance
-    
-    
 class SokobanGame:
-    def __init__(self):
+    def __init__(self, levels_path=LEVEL_PATH):
         self.root = tk.Tk()
         self.root.title("Sokoban Game")
 
@@ -176,45 +149,43 @@ class SokobanGame:
 
         # Quản lý assets và level
         self.assets = AssetManager()
-        self.level = Level(0)
+        # Thư mục levelN.txt hoặc file pack nhiều level (XSB/SOK), đọc dần khi cần
+        self.levels = open_levels(levels_path)
+        self.level = self.load_level(0)
         self.targets = self.get_targets_positions()
+        # Trạng thái solver chạy nền
+        self.busy = False
+        self.solver_job = None
+        self.replay_job = None
+        self.cache = SolutionCache()
         # Thêm các thành phần game
         self.create_menu()
         self.create_game_canvas()
     
-    # Kiểm tra nếu một box bị deadlock do nằm ở góc giữa hai wall/box.
+    # Kiểm tra nếu một box nằm ở ô không bao giờ đẩy tới target được (xem compute_dead_squares).
     def is_deadlock(self, box_x, box_y):
-        if (self.level.data[box_x-1][box_y] in ['#'] and self.level.data[box_x][box_y-1] in ['#']) or \
-            (self.level.data[box_x-1][box_y] in ['#'] and self.level.data[box_x][box_y+1] in ['#']) or \
-            (self.level.data[box_x+1][box_y] in ['#'] and self.level.data[box_x][box_y-1] in ['#']) or \
-            (self.level.data[box_x+1][box_y] in ['#'] and self.level.data[box_x][box_y+1] in ['#']):
+        return self.level.dead_squares[box_x][box_y]
+
+    # Chỉ kiểm tra box vừa được đẩy: ô chết tĩnh hoặc bị freeze cùng các box/wall xung quanh
+    def check_box_for_deadlock(self, box_x, box_y):
+        if self.level.data[box_x][box_y] == "$" and self.is_deadlock(box_x, box_y):
             return True
-        return False
+        freeze = self.level.freeze_deadlocks
 
-    def check_all_boxes_for_deadlock(self):
-        for i, row in enumerate(self.level.data):
-            for j, tile in enumerate(row):
-                if tile == '$':
-                    if self.is_deadlock(i, j):
-                        return True
-        return False
+        def has_box(index):
+            return divmod(index, freeze.width) in self.level.boxes
+
+        return freeze.is_deadlock(freeze.index(box_x, box_y), has_box)
     
     def canMove(self, x, y):
         return self.level.data[x][y] not in ["#", "$", "*"]
 
+    # Level giữ sẵn vị trí player và targets, không cần quét grid mỗi lần bấm phím
     def get_player_positions(self):
-        for i, row in enumerate(self.level.data):
-            for j, tile in enumerate(row):
-                if tile == "@":
-                    return i, j
+        return self.level.player
 
     def get_targets_positions(self):
-        targets = []
-        for i, row in enumerate(self.level.data):
-            for j, tile in enumerate(row):
-                if tile == ".":
-                    targets.append((i, j))
-        return targets
+        return list(self.level.targets)
           
     def is_Completed(self):
         for x, y in self.targets:
@@ -225,6 +196,8 @@ class SokobanGame:
     def update_position(self, old_x, old_y, new_x, new_y, symbol):
         self.level.data[old_x][old_y] = " "
         self.level.data[new_x][new_y] = symbol
+        if symbol == "@":
+            self.level.move_player((new_x, new_y))
 
         # xử lý targets
         if (old_x, old_y) in self.targets:
@@ -232,9 +205,12 @@ class SokobanGame:
         else:
             self.level.data[old_x][old_y] = " "
     
-    def update_ui(self):
-        self.game_canvas.canvas.delete(tk.ALL)
-        self.game_canvas.draw_level(self.level, self.assets.assets)
+    # cells: các ô thay đổi; None thì vẽ lại toàn bộ level
+    def update_ui(self, cells=None):
+        if cells is None:
+            self.game_canvas.draw_level(self.level, self.assets.assets)
+        else:
+            self.game_canvas.update_cells(self.level, self.assets.assets, cells)
 
     # Điều khiển player bằng phím mũi tên
     def move_player_and_box(self, dx, dy):
@@ -243,6 +219,7 @@ class SokobanGame:
 
         # Biến để theo dõi xem có thay đổi không
         moved = False
+        pushed = False
 
         # Kiểm tra nếu vị trí mới hợp lệ (không đụng wall)
         if self.canMove(next_x, next_y):
@@ -259,24 +236,26 @@ class SokobanGame:
                 self.update_position(cur_x, cur_y, box_x, box_y, "@")
                 
                 # Xử lý box
+                self.level.move_box((box_x, box_y), (new_box_x, new_box_y))
                 if self.level.data[new_box_x][new_box_y] == " ":
                     self.level.data[new_box_x][new_box_y] = "$"
                 elif self.level.data[new_box_x][new_box_y] == ".":
                     self.level.data[new_box_x][new_box_y] = "*"
                 
                 moved = True
+                pushed = True
             else:
                 print("Cannot push box")
 
-        # Cập nhật UI ngay lập tức sau mỗi lần di chuyển
+        # Cập nhật UI ngay lập tức sau mỗi lần di chuyển, chỉ vẽ lại ô cũ/mới của player và box
         if moved:
-            self.update_ui()
+            self.update_ui([(cur_x, cur_y), (next_x, next_y), (next_x + dx, next_y + dy)])
             
             if self.is_Completed():
                 messagebox.showinfo("Successful", "Game solved successfully!") 
 
             # Kiểm tra trạng thái Deadlock sau khi di chuyển
-            elif self.check_all_boxes_for_deadlock():
+            elif pushed and self.check_box_for_deadlock(next_x + dx, next_y + dy):
                 messagebox.showerror("Deadlock", "Your game is now deadlock!")        
 
     # Điều khiển nhân vật di chuyển theo hướng.
@@ -289,7 +268,7 @@ class SokobanGame:
     def create_menu(self):
         menu_x = 40
         menu_y = 70
-        menu_spacing = 60
+        menu_spacing = 46
 
         a_star_button = tk.Button(self.root, text="A*", bg="#aaffaa", font=("Arial", 12), width=12, command=self.btn_Astar_click)
         self.main_canvas.canvas.create_window(menu_x, menu_y, window=a_star_button, anchor="nw")
@@ -313,196 +292,207 @@ class SokobanGame:
 
         ids_button = tk.Button(self.root, text="Ids", bg="#aaffaa", font=("Arial", 12), width=12, command=self.btn_ids_click)
         self.main_canvas.canvas.create_window(menu_x, menu_y, window=ids_button, anchor="nw")
+        menu_y += menu_spacing
+
+        bidirectional_button = tk.Button(self.root, text="Bidirectional", bg="#aaffaa", font=("Arial", 12), width=12, command=self.btn_bidirectional_click)
+        self.main_canvas.canvas.create_window(menu_x, menu_y, window=bidirectional_button, anchor="nw")
+        menu_y += menu_spacing
+
+        ida_star_button = tk.Button(self.root, text="IDA*", bg="#aaffaa", font=("Arial", 12), width=12, command=self.btn_ida_star_click)
+        self.main_canvas.canvas.create_window(menu_x, menu_y, window=ida_star_button, anchor="nw")
+        menu_y += menu_spacing
+
+        portfolio_button = tk.Button(self.root, text="Portfolio", bg="#aaffaa", font=("Arial", 12), width=12, command=self.btn_portfolio_click)
+        self.main_canvas.canvas.create_window(menu_x, menu_y, window=portfolio_button, anchor="nw")
+        menu_y += menu_spacing
+
+        cancel_button = tk.Button(self.root, text="Cancel", bg="#ffaaaa", font=("Arial", 12), width=12, command=self.btn_cancel_click)
+        self.main_canvas.canvas.create_window(menu_x, menu_y, window=cancel_button, anchor="nw")
+
+        # Tiến độ của solver
+        self.status_label = tk.Label(self.root, text="", bg="#d9d9d9", font=("Arial", 10))
+        self.main_canvas.canvas.create_window(220, 15, window=self.status_label, anchor="nw")
 
 
     # Game zone
+    # Canvas của grid và các nút chuyển level chỉ tạo một lần; đổi level thì draw_game_grid
     def create_game_canvas(self):
-        game_x = 220
-        game_y = 50
-        game_canvas_width = len(self.level.data[0]) * TILE_SIZE
-        game_canvas_height = len(self.level.data) * TILE_SIZE
-
-        self.game_canvas = GameCanvas(self.main_canvas.canvas, game_canvas_width, game_canvas_height)
-        self.game_canvas.canvas.place(x=game_x, y=game_y)
-        self.game_canvas.draw_level(self.level, self.assets.assets)
+        self.game_canvas = GameCanvas(self.main_canvas.canvas, 0, 0)
+        self.game_canvas.canvas.place(x=GAME_X, y=GAME_Y)
 
         # Level navigation buttons
-        nav_x = game_x
-        nav_y = game_y + game_canvas_height + 40
-
         prev_button = tk.Button(self.root, text="Previous", bg="#d9d9d9", font=("Arial", 10), width=10, command=self.btn_pre_click)
-        self.main_canvas.canvas.create_window(nav_x, nav_y, window=prev_button, anchor="nw")
-
         reset_button = tk.Button(self.root, text="Reset", bg="#d9d9d9", font=("Arial", 10), width=10, command=self.btn_reset_click)
-        self.main_canvas.canvas.create_window(nav_x + 150, nav_y, window=reset_button, anchor="nw")
-
         next_button = tk.Button(self.root, text="Next", bg="#d9d9d9", font=("Arial", 10), width=10, command=self.btn_next_click)
-        self.main_canvas.canvas.create_window(nav_x + 300, nav_y, window=next_button, anchor="nw")
+        self.nav_items = [
+            self.main_canvas.canvas.create_window(GAME_X + 150 * i, GAME_Y, window=button, anchor="nw")
+            for i, button in enumerate([prev_button, reset_button, next_button])
+        ]
+        self.draw_game_grid()
+
+    # Đổi kích thước grid theo level hiện tại, vẽ lại level và dời các nút xuống dưới grid
+    def draw_game_grid(self):
+        game_canvas_width = max(len(row) for row in self.level.data) * TILE_SIZE
+        game_canvas_height = len(self.level.data) * TILE_SIZE
+        self.game_canvas.canvas.config(width=game_canvas_width, height=game_canvas_height)
+        self.game_canvas.draw_level(self.level, self.assets.assets)
+
+        nav_y = GAME_Y + game_canvas_height + 40
+        for i, item in enumerate(self.nav_items):
+            self.main_canvas.canvas.coords(item, GAME_X + 150 * i, nav_y)
+
+    # Level thứ n trong bộ level đang mở
+    def load_level(self, n):
+        self.root.title(f"Sokoban Game - {self.levels.title(n)}")
+        return Level(n, self.levels[n])
+
+    # Chuyển sang level thứ n, chỉ thay grid (canvas chính, nền và menu giữ nguyên)
+    def show_level(self, n):
+        self.stop_solver()
+        self.level = self.load_level(n)
+        self.targets = self.get_targets_positions()
+        self.draw_game_grid()
 
     def btn_reset_click(self):
-        level_cur_number = self.level.number
-        self.game_canvas.canvas.delete(tk.ALL)
-        self.level = Level(level_cur_number)
-        self.create_game_canvas()
-    
+        self.show_level(self.level.number)
+
     def btn_pre_click(self):
-        self.game_canvas.canvas.destroy()
-        self.main_canvas.canvas.destroy()
-        level_next_number = (self.level.number - 1) % 9
-        self.main_canvas = GameCanvas(self.root, 750, 530)
-        self.main_canvas.draw_background(ASSET_PATH + "BG.jpg")
-        self.level = Level(level_next_number)
-        self.targets = self.get_targets_positions()
-        self.create_menu()
-        self.create_game_canvas()
+        self.show_level((self.level.number - 1) % len(self.levels))
 
     def btn_next_click(self):
-        self.game_canvas.canvas.destroy()
-        self.main_canvas.canvas.destroy()
-        level_next_number = (self.level.number + 1) % 9
-        self.main_canvas = GameCanvas(self.root, 750, 530)
-        self.main_canvas.draw_background(ASSET_PATH + "BG.jpg")
-        self.level = Level(level_next_number)
-        self.targets = self.get_targets_positions()
-        self.create_menu()
-        self.create_game_canvas()
+        self.show_level((self.level.number + 1) % len(self.levels))
 
     def btn_Astar_click(self):
-        try:
-            problem = SokobanProblem(self.level)
-            
-            # Use astar search
-            result = astar(problem, graph_search=True)
-            if not result:
-                messagebox.showwarning("Warning", "No solution found!")
-            path = [x[0] for x in result.path()]
-            for action in path[1:]:
-                print(action + ", ", end=" ")
-                self.move(action)
-                self.update_ui()  # Update interface
-                self.root.update()  # Ép buộc Tkinter vẽ lại
-                time.sleep(0.08)  # Pause to show movement
-            print()
-        
-        except Exception as e:
-            print(f"Error solving Sokoban: {e}")
-            messagebox.showerror("Error", str(e))
+        self.solve_level("astar", "A*")
 
     def btn_BFS_click(self):
-        try:
-            problem = SokobanProblem(self.level)
-            
-            # Use BFS search
-            result = breadth_first(problem, graph_search=True)
-            if not result:
-                messagebox.showwarning("Warning", "No solution found!")
-            path = [x[0] for x in result.path()]
-            for action in path[1:]:
-                print(action + ", ", end=" ")
-                self.move(action)
-                self.update_ui()  # Update interface
-                self.root.update()  # Ép buộc Tkinter vẽ lại
-                time.sleep(0.08)  # Pause to show movement
-            print()
-        
-        except Exception as e:
-            print(f"Error solving Sokoban: {e}")
-            messagebox.showerror("Error", str(e))
+        self.solve_level("bfs", "BFS")
 
     def btn_DFS_click(self):
-        try:
-            problem = SokobanProblem(self.level)
-            
-            # Use BFS search
-            result = depth_first(problem, graph_search=True)
-            if not result:
-                messagebox.showwarning("Warning", "No solution found!")
-            path = [x[0] for x in result.path()]
-            for action in path[1:]:
-                print(action + ", ", end=" ")
-                self.move(action)
-                self.update_ui()  # Update interface
-                self.root.update()  # Ép buộc Tkinter vẽ lại
-                time.sleep(0.08)  # Pause to show movement
-            print()
-        
-        except Exception as e:
-            print(f"Error solving Sokoban: {e}")
-            messagebox.showerror("Error", str(e))
-            
+        self.solve_level("dfs", "DFS")
+
     def btn_greedy_click(self):
-        try:
-            problem = SokobanProblem(self.level)
-            
-            # Use BFS search
-            result = greedy(problem, graph_search=True)
-            if not result:
-                messagebox.showwarning("Warning", "No solution found!")
-            print (result)
-            path = [x[0] for x in result.path()]
-            for action in path[1:]:
-                print(action + ", ", end=" ")
-                self.move(action)
-                self.update_ui()  # Update interface
-                self.root.update()  # Ép buộc Tkinter vẽ lại
-                time.sleep(0.08)  # Pause to show movement
-            print()
-        
-        except Exception as e:
-            print(f"Error solving Sokoban: {e}")
-            messagebox.showerror("Error", str(e))
+        self.solve_level("greedy", "Greedy")
 
     def btn_uniform_cost_click(self):
-        try:
-            problem = SokobanProblem(self.level)
-            
-            # Use BFS search
-            result = uniform_cost(problem, graph_search=True)
-            if not result:
-                messagebox.showwarning("Warning", "No solution found!")
-            path = [x[0] for x in result.path()]
-            for action in path[1:]:
-                print(action + ", ", end=" ")
-                self.move(action)
-                self.update_ui()  # Update interface
-                self.root.update()  # Ép buộc Tkinter vẽ lại
-                time.sleep(0.08)  # Pause to show movement
-            print()
-        
-        except Exception as e:
-            print(f"Error solving Sokoban: {e}")
-            messagebox.showerror("Error", str(e))
+        self.solve_level("uniform_cost", "Uniform cost")
 
     def btn_ids_click(self):
-        try:
-            problem = SokobanProblem(self.level)
-            
-            # Use BFS search
-            result = iterative_limited_depth_first(problem, graph_search=True)
-            if not result:
-                messagebox.showwarning("Warning", "No solution found!")
-            path = [x[0] for x in result.path()]
-            for action in path[1:]:
-                print(action + ", ", end=" ")
-                self.move(action)
-                self.update_ui()  # Update interface
-                self.root.update()  # Ép buộc Tkinter vẽ lại
-                time.sleep(0.08)  # Pause to show movement
+        self.solve_level("ids", "Ids")
+
+    def btn_bidirectional_click(self):
+        self.solve_level("bidirectional", "Bidirectional")
+
+    def btn_ida_star_click(self):
+        self.solve_level("ida_star", "IDA*")
+
+    # Chạy song song nhiều thuật toán, lấy lời giải đầu tiên
+    def btn_portfolio_click(self):
+        self.solve_level("portfolio", "Portfolio")
+
+    def btn_cancel_click(self):
+        self.stop_solver()
+        self.status_label.config(text="Cancelled")
+
+    # Giải trong thread riêng để cửa sổ không bị đơ; tiến độ được đọc lại bằng root.after
+    def solve_level(self, algorithm, title):
+        if self.busy:
+            return
+        self.busy = True
+        key = solution_key(self.level, algorithm, self.targets)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.status_label.config(text=f"{title}: cached solution ({len(cached['moves'])} moves)")
+            self.replay(cached["moves"])
+            return
+        # Solver làm việc trên bản sao, không bị ảnh hưởng khi UI thay đổi level.data
+        level = copy.copy(self.level)
+        level.data = [row[:] for row in self.level.data]
+        level.boxes = set(self.level.boxes)
+        job = {"title": title, "algorithm": algorithm, "key": key, "level": level, "stats": {},
+               "cancel": threading.Event(), "started": time.perf_counter()}
+
+        def work():
+            try:
+                job["moves"] = solve(level, algorithm, self.targets, job["stats"], job["cancel"])
+            except SearchCancelled:
+                job["cancelled"] = True
+            except Exception as e:
+                job["error"] = e
+            job["done"] = True
+
+        self.solver_job = job
+        threading.Thread(target=work, daemon=True).start()
+        self.poll_solver(job)
+
+    def poll_solver(self, job):
+        if job is not self.solver_job:
+            return
+        stats = job["stats"]
+        expanded = stats.get("expanded", 0)
+        frontier = stats.get("generated", 0) - expanded
+        elapsed = time.perf_counter() - job["started"]
+        if "winner" in stats:
+            self.status_label.config(text=f"{job['title']}: {stats['winner']} finished first | {elapsed:.1f}s")
+        elif "running" in stats:
+            self.status_label.config(text=f"{job['title']}: racing {', '.join(stats['running'])} | {elapsed:.1f}s")
+        else:
+            self.status_label.config(text=f"{job['title']}: expanded {expanded} | frontier ~{frontier} | {elapsed:.1f}s")
+        if not job.get("done"):
+            self.root.after(100, self.poll_solver, job)
+            return
+
+        self.solver_job = None
+        if job.get("cancelled"):
+            self.busy = False
+        elif "error" in job:
+            self.busy = False
+            print(f"Error solving Sokoban: {job['error']}")
+            messagebox.showerror("Error", str(job["error"]))
+        elif job["moves"] is None:
+            self.busy = False
+            messagebox.showwarning("Warning", "No solution found!")
+        else:
+            solution = compress_solution(job["level"], job["moves"])
+            if solution is not None:
+                self.cache.put(job["key"], job["algorithm"], solution, dict(job["stats"], time=elapsed))
+            self.replay(job["moves"])
+
+    # Replay lời giải bằng timer thay vì sleep
+    def replay(self, path, index=0):
+        if index >= len(path):
             print()
-        
-        except Exception as e:
-            print(f"Error solving Sokoban: {e}")
-            messagebox.showerror("Error", str(e))
-
+            self.replay_job = None
+            self.busy = False
+            return
+        print(path[index] + ", ", end=" ")
+        self.move(path[index])
+        self.replay_job = self.root.after(REPLAY_DELAY, self.replay, path, index + 1)
+
+    # Dừng search đang chạy (nếu có) và replay đang chạy
+    def stop_solver(self):
+        if self.solver_job is not None:
+            self.solver_job["cancel"].set()
+            self.solver_job = None
+        if self.replay_job is not None:
+            self.root.after_cancel(self.replay_job)
+            self.replay_job = None
+        self.busy = False
+
+    # Phím mũi tên bị bỏ qua khi đang giải/replay
+    def key_move(self, action):
+        if not self.busy:
+            self.move(action)
 
     def run(self):
         self.root.mainloop()
 
 
 if __name__ == "__main__":
-    game = SokobanGame()
-    game.root.bind("<Up>", lambda event: game.move('U'))
-    game.root.bind("<Down>", lambda event: game.move('D'))
-    game.root.bind("<Left>", lambda event: game.move('L'))
-    game.root.bind("<Right>", lambda event: game.move('R'))
+    # python app.py [thư mục level | file pack .xsb/.sok]
+    game = SokobanGame(sys.argv[1] if len(sys.argv) > 1 else LEVEL_PATH)
+    game.root.bind("<Up>", lambda event: game.key_move('U'))
+    game.root.bind("<Down>", lambda event: game.key_move('D'))
+    game.root.bind("<Left>", lambda event: game.key_move('L'))
+    game.root.bind("<Right>", lambda event: game.key_move('R'))
     game.run()
@@ -0,0 +1,117 @@
+# Giải headless nhiều level song song, ghi kết quả dạng JSON lines.
+#
+#   python batch_solve.py                        # mọi levels/levelN.txt
+#   python batch_solve.py "../levels/level[5-9].txt" -a astar,bfs -j 4 --time-limit 60
+#   python batch_solve.py pack.txt -o solutions.jsonl --memory-limit 2048
+import argparse
+import json
+import os
+import resource
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache import CACHE_PATH, SolutionCache, solution_key
+from level import DEFAULT_LEVELS, Level, collect_levels
+from solver import ALGORITHMS, PORTFOLIO, solve_with_stats
+from verify import compress_solution
+
+
+class JobTimeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise JobTimeout()
+
+
+def init_worker(memory_limit):
+    if memory_limit:
+        limit = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    signal.signal(signal.SIGALRM, _on_alarm)
+
+
+# tt_memory: MB cho transposition table (0 = mặc định của thuật toán)
+# count_closed: đếm thêm số state khác nhau đã mở rộng (tốn bộ nhớ, dùng cho benchmark)
+def run_job(name, rows, algorithm, time_limit, tt_memory=0, tt_policy=None, count_closed=False):
+    record = {"level": name, "algorithm": algorithm}
+    if time_limit:
+        signal.setitimer(signal.ITIMER_REAL, time_limit)
+    try:
+        record.update(solve_with_stats(Level(name, rows), algorithm, tt_memory * 1024 * 1024 or None, tt_policy,
+                                       count_closed))
+    except JobTimeout:
+        record.update(status="timeout", time=time_limit)
+    except MemoryError:
+        record.update(status="memory")
+    except Exception as e:
+        record.update(status="error", error=str(e))
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve Sokoban levels headless and write JSON lines.")
+    parser.add_argument("paths", nargs="*", default=[DEFAULT_LEVELS],
+                        help="level directories, files (one or many levels) or glob patterns")
+    parser.add_argument("-a", "--algorithms", default="astar",
+                        help="comma separated: " + ", ".join(list(ALGORITHMS) + [PORTFOLIO]))
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--time-limit", type=float, default=0, help="seconds per job (0 = no limit)")
+    parser.add_argument("--memory-limit", type=int, default=0, help="MB per worker (0 = no limit)")
+    parser.add_argument("--tt-memory", type=int, default=0,
+                        help="MB for the transposition table of *_tt and ida_star (0 = default)")
+    parser.add_argument("--tt-policy", choices=["shallower", "always"],
+                        help="transposition table replacement policy (default: shallower)")
+    parser.add_argument("-o", "--output", help="JSON lines file (default: stdout)")
+    parser.add_argument("--cache", nargs="?", const=CACHE_PATH,
+                        help="reuse and store solutions in this SQLite cache (default path if no value)")
+    args = parser.parse_args(argv)
+
+    algorithms = [name.strip() for name in args.algorithms.split(",") if name.strip()]
+    for name in algorithms:
+        if name not in ALGORITHMS and name != PORTFOLIO:
+            parser.error(f"unknown algorithm: {name}")
+    levels = collect_levels(args.paths)
+
+    cache = SolutionCache(args.cache) if args.cache else None
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker,
+                                 initargs=(args.memory_limit,)) as pool:
+            jobs = {}
+            for name, rows in levels:
+                level = Level(name, rows)
+                for algorithm in algorithms:
+                    key = solution_key(level, algorithm)
+                    cached = cache.get(key) if cache is not None else None
+                    if cached is not None:
+                        # Level đã giải rồi: ghi lại kết quả cũ, không chạy lại
+                        record = dict(cached["stats"], level=name, algorithm=algorithm, status="solved",
+                                      moves=cached["moves"], cached=True)
+                        out.write(json.dumps(record) + "\n")
+                        continue
+                    jobs[pool.submit(run_job, name, rows, algorithm, args.time_limit,
+                                     args.tt_memory, args.tt_policy)] = (key, rows)
+            for job in as_completed(jobs):
+                record = job.result()
+                solution = None
+                if cache is not None and record["status"] == "solved":
+                    key, rows = jobs[job]
+                    solution = compress_solution(Level(record["level"], rows), record["moves"])
+                if solution is not None:
+                    stats = {k: v for k, v in record.items() if k not in ["level", "algorithm", "moves"]}
+                    cache.put(key, record["algorithm"], solution, stats)
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# Benchmark các thuật toán giải trên các level, và so sánh hai lần chạy.
+#
+#   python benchmark.py run -a astar,astar_tt -n 5 -o base.json
+#   ... sửa code ...
+#   python benchmark.py run -a astar,astar_tt -n 5 -o new.json
+#   python benchmark.py compare base.json new.json --threshold 0.10
+#
+# Mỗi lần chạy nằm trong một process riêng để peak RSS không bị lẫn giữa các lần.
+import argparse
+import json
+import platform
+import resource
+import statistics
+import sys
+import time
+from multiprocessing import Pool
+
+from batch_solve import run_job, init_worker
+from level import DEFAULT_LEVELS, collect_levels
+from solver import ALGORITHMS
+
+# Các chỉ số mà giá trị lớn hơn là tệ hơn
+METRICS = ["time", "expanded", "generated", "closed", "peak_rss_kb", "length"]
+
+
+def _run_once(name, rows, algorithm, time_limit, memory_limit, tt_memory, tt_policy):
+    init_worker(memory_limit)
+    record = run_job(name, rows, algorithm, time_limit, tt_memory, tt_policy, count_closed=True)
+    record["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    record.pop("moves", None)
+    return record
+
+
+def run_benchmark(levels, algorithms, repeat, time_limit=0, memory_limit=0, tt_memory=0, tt_policy=None):
+    results = []
+    for name, rows in levels:
+        for algorithm in algorithms:
+            runs = []
+            for _ in range(repeat):
+                with Pool(processes=1) as pool:
+                    runs.append(pool.apply(_run_once, (name, rows, algorithm, time_limit, memory_limit,
+                                                          tt_memory, tt_policy)))
+            first = runs[0]
+            times = [run["time"] for run in runs if "time" in run]
+            results.append({
+                "level": name,
+                "algorithm": algorithm,
+                "status": first["status"],
+                "repeat": repeat,
+                "time": min(times) if times else None,
+                "time_median": statistics.median(times) if times else None,
+                "expanded": first.get("expanded"),
+                "generated": first.get("generated"),
+                "closed": first.get("closed"),
+                "peak_rss_kb": max(run["peak_rss_kb"] for run in runs),
+                "length": first.get("length"),
+                "pushes": first.get("pushes"),
+            })
+            # Số liệu transposition table (tt_hits, tt_collisions, ...) và freeze deadlock của lần chạy đầu
+            results[-1].update((key, value) for key, value in first.items() if key.startswith(("tt_", "freeze_")))
+            print(f"{name:<16} {algorithm:<14} {first['status']:<9} "
+                  f"time={results[-1]['time']} expanded={results[-1]['expanded']}", file=sys.stderr)
+    return results
+
+
+# So sánh hai lần chạy, trả về danh sách các dòng bị chậm/tệ hơn quá `threshold`
+def compare(base, new, threshold=0.10):
+    old = {(row["level"], row["algorithm"]): row for row in base["results"]}
+    regressions = []
+    for row in new["results"]:
+        key = (row["level"], row["algorithm"])
+        before = old.get(key)
+        if before is None:
+            continue
+        if before["status"] == "solved" and row["status"] != "solved":
+            regressions.append((key, "status", before["status"], row["status"]))
+            continue
+        for metric in METRICS:
+            a, b = before.get(metric), row.get(metric)
+            if a is None or b is None:
+                continue
+            if b > a * (1 + threshold) and b - a > (0.005 if metric == "time" else 0):
+                regressions.append((key, metric, a, b))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Sokoban solvers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmark and write a JSON report")
+    run.add_argument("paths", nargs="*", default=[DEFAULT_LEVELS])
+    run.add_argument("-a", "--algorithms", default=",".join(ALGORITHMS))
+    run.add_argument("-n", "--repeat", type=int, default=3)
+    run.add_argument("--time-limit", type=float, default=60)
+    run.add_argument("--memory-limit", type=int, default=0, help="MB per run (0 = no limit)")
+    run.add_argument("--tt-memory", type=int, default=0, help="MB per transposition table (0 = default)")
+    run.add_argument("--tt-policy", choices=["shallower", "always"])
+    run.add_argument("-o", "--output", default="benchmark.json")
+
+    cmp = commands.add_parser("compare", help="compare two reports and flag regressions")
+    cmp.add_argument("base")
+    cmp.add_argument("new")
+    cmp.add_argument("--threshold", type=float, default=0.10, help="allowed relative increase")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        algorithms = [name.strip() for name in args.algorithms.split(",") if name.strip()]
+        results = run_benchmark(collect_levels(args.paths), algorithms, args.repeat,
+                                args.time_limit, args.memory_limit, args.tt_memory, args.tt_policy)
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        return 0
+
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    regressions = compare(base, new, args.threshold)
+    for (level, algorithm), metric, before, after in regressions:
+        print(f"REGRESSION {level} {algorithm} {metric}: {before} -> {after}")
+    if not regressions:
+        print("No regressions.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
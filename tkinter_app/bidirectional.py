@@ -0,0 +1,53 @@
+# Bidirectional search over CompactPushProblem: forward with pushes from the initial
+# state, backward with pulls from the goal configuration, one BFS layer at a time on
+# whichever side has the smaller frontier, until both sides reach the same
+# normalized state. Returns the list of push actions (problem.moves() accepts it).
+def bidirectional(problem):
+    start = problem.initial_state
+    if problem.is_goal(start):
+        return []
+    forward = {start: None}
+    backward = {state: None for state in problem.goal_states()}
+    if start in backward:
+        return []
+
+    forward_frontier = [start]
+    backward_frontier = list(backward)
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meet = _expand(forward_frontier, forward, backward, problem.actions, problem.result)
+        else:
+            backward_frontier, meet = _expand(backward_frontier, backward, forward, problem.pull_actions, problem.pull_result)
+        if meet is not None:
+            return _join(forward, backward, meet)
+    return None
+
+
+# Mở rộng một lớp BFS; trả về (lớp tiếp theo, state gặp nhau hoặc None)
+def _expand(frontier, seen, other, actions, result):
+    layer = []
+    for state in frontier:
+        for action in actions(state):
+            child = result(state, action)
+            if child in seen:
+                continue
+            seen[child] = (state, action)
+            if child in other:
+                return layer, child
+            layer.append(child)
+    return layer, None
+
+
+def _join(forward, backward, meet):
+    pushes = []
+    state = meet
+    while forward[state] is not None:
+        state, action = forward[state]
+        pushes.append(action)
+    pushes.reverse()
+    # Đi ngược lại một lần kéo box -> target chính là đẩy target -> box
+    state = meet
+    while backward[state] is not None:
+        state, (box, target) = backward[state]
+        pushes.append((target, box))
+    return pushes
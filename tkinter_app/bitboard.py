@@ -0,0 +1,174 @@
+from simpleai.search import SearchProblem
+from heuristic import MatchingHeuristic
+from macros import MacroMoves
+
+
+# Iterate the indexes of the set bits of a mask
+def bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+# Compact variant of PushSokobanProblem.
+# Cells are flat indexes (x * width + y) and the boxes are one int bitmask, so a
+# state is (player region representative, box mask): cheap to hash, independent
+# of box order, and the goal test is a single mask comparison.
+#
+# With macros=True a push that starts a tunnel or goal-room macro (see MacroMoves)
+# becomes the action (box, final cell, push directions) and costs one per push.
+class CompactPushProblem(SearchProblem):
+    def __init__(self, level, targets=None, macros=True):
+        self.level = level
+        index = level.index
+        # Lưới, sàn, wall và targets dùng chung từ chỉ mục của level
+        self.height = index.height
+        self.width = index.width
+        self.offsets = index.offsets
+        self.directions = {offset: action for action, offset in self.offsets.items()}
+        self.floor = index.floor
+
+        goal_mask = index.goal_mask
+        if targets is not None:
+            goal_mask = 0
+            for x, y in targets:
+                goal_mask |= 1 << self.to_index(x, y)
+        player = self.to_index(*level.player)
+        box_mask = 0
+        for x, y in level.boxes:
+            box_mask |= 1 << self.to_index(x, y)
+
+        dead_mask = 0
+        for x, row in enumerate(level.dead_squares):
+            for y, dead in enumerate(row):
+                if dead:
+                    dead_mask |= 1 << self.to_index(x, y)
+        self.live = self.floor & ~dead_mask
+        self.freeze = level.freeze_deadlocks
+        self.goal_mask = goal_mask
+        self.non_goal = self.floor & ~goal_mask
+        self.player = player
+        self.boxes = box_mask
+
+        offsets = list(self.offsets.values())
+        self.matching = MatchingHeuristic(
+            bits(goal_mask), set(index.cells),
+            lambda index: [(index + offset, index + 2 * offset) for offset in offsets],
+        )
+
+        self.macros = MacroMoves(level, self.live, bits(goal_mask)) if macros else None
+
+        self._last_reach = (None, 0)
+        self._last_push = None
+        self.initial_state = (self.normalize(player, box_mask), box_mask)
+        super(CompactPushProblem, self).__init__(initial_state=self.initial_state)
+
+    def to_index(self, x, y):
+        return x * self.width + y
+
+    def to_cell(self, index):
+        return divmod(index, self.width)
+
+    # Flood fill vùng player đi tới được bằng phép shift trên bitmask
+    def reachable(self, player, box_mask):
+        key = (player, box_mask)
+        if self._last_reach[0] == key:
+            return self._last_reach[1]
+        free = self.floor & ~box_mask
+        width = self.width
+        reach = 1 << player
+        while True:
+            grown = (reach | reach << 1 | reach >> 1 | reach << width | reach >> width) & free
+            if grown == reach:
+                break
+            reach = grown
+        self._last_reach = (key, reach)
+        return reach
+
+    def normalize(self, player, box_mask):
+        reach = self.reachable(player, box_mask)
+        return (reach & -reach).bit_length() - 1
+
+    def is_goal(self, state):
+        return state[1] & self.non_goal == 0
+
+    # Mỗi action là một lần đẩy: (ô box hiện tại, ô box sau khi đẩy),
+    # hoặc một macro: (ô box hiện tại, ô box cuối cùng, chuỗi hướng đẩy)
+    def actions(self, state):
+        player, box_mask = state
+        reach = self.reachable(player, box_mask)
+        free = self.live & ~box_mask
+        actions = []
+        for box in bits(box_mask):
+            for offset in self.offsets.values():
+                target = box + offset
+                if reach >> (box - offset) & 1 and free >> target & 1:
+                    path = self.macros.expand(box, target, box_mask ^ (1 << box)) if self.macros else None
+                    if path is not None:
+                        target = self.follow(box, path)
+                    new_mask = box_mask ^ (1 << box) ^ (1 << target)
+                    if self.freeze.is_deadlock(target, lambda index: new_mask >> index & 1):
+                        continue
+                    actions.append((box, target) if path is None else (box, target, path))
+        return actions
+
+    # Ô box sau khi đẩy theo chuỗi hướng `path`
+    def follow(self, box, path):
+        for direction in path:
+            box += self.offsets[direction]
+        return box
+
+    def result(self, state, action):
+        box, target = action[0], action[1]
+        box_mask = state[1] ^ (1 << box) ^ (1 << target)
+        self._last_push = (state[1], box, target, box_mask)
+        # Sau macro player đứng ngay sau box ở lần đẩy cuối
+        player = box if len(action) == 2 else target - self.offsets[action[2][-1]]
+        return (self.normalize(player, box_mask), box_mask)
+
+    def cost(self, state, action, state2):
+        return 1 if len(action) == 2 else len(action[2])
+
+    # Các state đích cho search ngược: mọi box nằm trên target, player ở một vùng bất kỳ
+    def goal_states(self):
+        if bin(self.goal_mask).count("1") != bin(self.boxes).count("1"):
+            raise ValueError("Backward search needs as many boxes as targets")
+        states = []
+        free = self.floor & ~self.goal_mask
+        while free:
+            player = (free & -free).bit_length() - 1
+            region = self.reachable(player, self.goal_mask)
+            states.append((player, self.goal_mask))
+            free &= ~region
+        return states
+
+    # Search ngược: mỗi action là một lần kéo box (ô box hiện tại, ô box sau khi kéo)
+    # Player đứng cạnh box và lùi thêm một bước, box đi theo vào ô player vừa đứng
+    def pull_actions(self, state):
+        player, box_mask = state
+        reach = self.reachable(player, box_mask)
+        free = self.floor & ~box_mask
+        actions = []
+        for box in bits(box_mask):
+            for offset in self.offsets.values():
+                if reach >> (box + offset) & 1 and free >> (box + 2 * offset) & 1:
+                    actions.append((box, box + offset))
+        return actions
+
+    def pull_result(self, state, action):
+        box, target = action
+        box_mask = state[1] ^ (1 << box) ^ (1 << target)
+        return (self.normalize(2 * target - box, box_mask), box_mask)
+
+    # Matching box-target theo số lần đẩy (xem MatchingHeuristic.estimate)
+    def heuristic(self, state):
+        return self.matching.estimate(self._last_push, state[1], bits(state[1]))
+
+    # Chuyển danh sách push (result.path() hoặc list action) thành chuỗi U/D/L/R để replay
+    def moves(self, pushes):
+        if hasattr(pushes, "path"):
+            pushes = [action for action, _ in pushes.path()[1:]]
+        pushes = [(action[0], self.directions[action[1] - action[0]] if len(action) == 2 else action[2])
+                  for action in pushes]
+        return self.level.index.push_moves(self.player, bits(self.boxes), pushes)
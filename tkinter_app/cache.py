@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cache", "solutions.sqlite")
+
+
+# Key của một lời giải: hash của grid đã chuẩn hoá (bỏ khoảng trắng cuối dòng, dòng trống cuối)
+# cùng với targets, thuật toán và các tuỳ chọn
+def level_key(data, algorithm, targets=None, options=None):
+    rows = ["".join(row).rstrip() for row in data]
+    while rows and not rows[-1]:
+        rows.pop()
+    parts = ["\n".join(rows), algorithm]
+    if targets is not None:
+        parts.append(repr(sorted(targets)))
+    if options:
+        parts.append(json.dumps(options, sort_keys=True))
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+# Key lời giải của một Level ở trạng thái hiện tại; game và batch_solve đều dùng hàm này
+# nên lời giải tìm được ở bên này được bên kia dùng lại. targets mặc định là targets của level
+def solution_key(level, algorithm, targets=None, options=None):
+    return level_key(level.data, algorithm, targets if targets is not None else level.targets, options)
+
+
+# Lời giải được lưu dạng LURD nén run-length: "RRRUUl" -> "3R2Ul".
+# Giải nén hiểu cả nhóm trong ngoặc như "2(lU)", và chuỗi chưa nén vẫn giải nén ra chính nó
+def rle_encode(moves):
+    parts = []
+    for match in re.finditer(r"(.)\1*", moves):
+        run = len(match.group(0))
+        parts.append(f"{run}{match.group(1)}" if run > 1 else match.group(1))
+    return "".join(parts)
+
+
+def rle_decode(text):
+    stack = [[]]
+    count = ""
+    counts = []
+    for char in text:
+        if char.isdigit():
+            count += char
+        elif char == "(":
+            counts.append(int(count or 1))
+            count = ""
+            stack.append([])
+        elif char == ")":
+            if not counts:
+                raise ValueError(f"Unbalanced ')' in RLE solution: {text!r}")
+            group = "".join(stack.pop()) * counts.pop()
+            stack[-1].append(group)
+        elif not char.isspace():
+            stack[-1].append(char * int(count or 1))
+            count = ""
+    if counts:
+        raise ValueError(f"Unclosed '(' in RLE solution: {text!r}")
+    return "".join(stack[0])
+
+
+# Cache lời giải trên đĩa (SQLite), giữ tối đa max_entries lời giải, xoá cái lâu không dùng nhất trước
+class SolutionCache:
+    def __init__(self, path=CACHE_PATH, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS solutions ("
+            " key TEXT PRIMARY KEY, algorithm TEXT, moves TEXT, stats TEXT, created REAL, last_used REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+        self.db.commit()
+
+    # Trả về {"moves": ..., "stats": {...}} hoặc None; moves đã được giải nén, dạng U/D/L/R như solver trả về
+    def get(self, key):
+        row = self.db.execute("SELECT moves, stats FROM solutions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.db.execute("UPDATE solutions SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.db.commit()
+        return {"moves": rle_decode(row[0]).upper(), "stats": json.loads(row[1])}
+
+    # solution: lời giải dạng LURD đã nén run-length (xem verify.compress_solution)
+    def put(self, key, algorithm, solution, stats=None):
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?)",
+            (key, algorithm, solution, json.dumps(stats or {}), now, now),
+        )
+        self.db.execute(
+            "DELETE FROM solutions WHERE key IN ("
+            " SELECT key FROM solutions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self.db.commit()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,103 @@
+from collections import deque
+
+MOVES = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+# Precompute the squares a box can never leave towards a target.
+# Works backwards: starting with a box on every target, "pull" it in every
+# direction the player has room to stand; every square never reached is dead.
+# Returns a [row][col] grid of booleans (walls and outside cells are dead too).
+def compute_dead_squares(data):
+    height = len(data)
+    width = max(len(row) for row in data)
+    walls = [[True] * width for _ in range(height)]
+    targets = []
+    for x, row in enumerate(data):
+        for y, cell in enumerate(row):
+            walls[x][y] = cell == "#"
+            if cell in [".", "*", "+"]:
+                targets.append((x, y))
+
+    def is_floor(x, y):
+        return 0 <= x < height and 0 <= y < width and not walls[x][y]
+
+    alive = set(targets)
+    queue = deque(targets)
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in MOVES:
+            # Box moves to (x+dx, y+dy), player steps back to (x+2dx, y+2dy)
+            box = (x + dx, y + dy)
+            if box not in alive and is_floor(*box) and is_floor(x + 2 * dx, y + 2 * dy):
+                alive.add(box)
+                queue.append(box)
+
+    return [[(x, y) not in alive for y in range(width)] for x in range(height)]
+
+
+# Freeze deadlocks, checked only around the box that was just pushed.
+# A box is frozen when it cannot move on either axis: on each axis there is a wall
+# next to it, dead squares on both sides, or a neighbouring box that is frozen
+# itself (boxes being checked count as walls, which catches 2x2 blocks and
+# box-box-wall lines). A frozen group with a box off target can never be solved.
+# Every dead group found is remembered as a pattern (set of box cells) so any later
+# state containing those boxes is rejected without redoing the recursion.
+# Cells are flat indexes x * width + y, with width = longest row + 1.
+class FreezeDetector:
+    def __init__(self, data, dead_squares):
+        self.width = max(len(row) for row in data) + 1
+        self.walls = set()
+        self.dead = set()
+        self.goals = set()
+        for x, row in enumerate(data):
+            for y, cell in enumerate(row):
+                if cell == "#":
+                    self.walls.add(self.index(x, y))
+                if cell in [".", "*", "+"]:
+                    self.goals.add(self.index(x, y))
+        for x, row in enumerate(dead_squares):
+            for y, dead in enumerate(row):
+                if dead:
+                    self.dead.add(self.index(x, y))
+        self.patterns = {}
+        self.learned = 0  # số pattern đã học
+        self.hits = 0     # số lần một pattern đã học chặn được state
+
+    def index(self, x, y):
+        return x * self.width + y
+
+    def _frozen(self, box, has_box, group):
+        snapshot = set(group)
+        group.add(box)
+        for axis in (1, self.width):
+            before, after = box - axis, box + axis
+            if before in self.walls or after in self.walls:
+                continue
+            if before in self.dead and after in self.dead:
+                continue
+            if has_box(before) and (before in group or self._frozen(before, has_box, group)):
+                continue
+            if has_box(after) and (after in group or self._frozen(after, has_box, group)):
+                continue
+            # Các box chỉ bị chặn nhờ giả định box này là wall cũng không còn frozen
+            group.intersection_update(snapshot)
+            return False
+        return True
+
+    # box: ô (flat index) của box vừa bị đẩy; has_box(index): có box ở ô đó không
+    def is_deadlock(self, box, has_box):
+        for pattern in self.patterns.get(box, ()):
+            if all(has_box(cell) for cell in pattern):
+                self.hits += 1
+                return True
+        group = set()
+        if not self._frozen(box, has_box, group) or group <= self.goals:
+            return False
+        pattern = frozenset(group)
+        for cell in pattern:
+            self.patterns.setdefault(cell, []).append(pattern)
+        self.learned += 1
+        return True
+
+    def stats(self):
+        return {"patterns": self.learned, "hits": self.hits}
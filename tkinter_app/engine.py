@@ -0,0 +1,133 @@
+import heapq
+from itertools import count
+from simpleai.search.models import SearchNode
+from heuristic import INF
+from transposition import TranspositionTable, ZobristHasher
+
+
+# Best-first search over CompactPushProblem whose closed set is a bounded
+# TranspositionTable keyed by incremental Zobrist hashes.
+# Returns the goal SearchNode (same as simpleai, so problem.moves(result) works) or None.
+def _search(problem, priority, table=None, hasher=None):
+    table = table if table is not None else TranspositionTable()
+    hasher = hasher if hasher is not None else ZobristHasher(problem)
+    tie = count()
+
+    root = SearchNode(state=problem.initial_state, problem=problem)
+    fringe = [(priority(root, problem.heuristic(root.state)), next(tie), root, hasher.hash(root.state))]
+    while fringe:
+        _, _, node, key = heapq.heappop(fringe)
+        if table.seen(key, node.cost):
+            continue
+        if problem.is_goal(node.state):
+            return node
+        for action in problem.actions(node.state):
+            state = problem.result(node.state, action)
+            child_key = hasher.update(key, node.state, action, state)
+            cost = node.cost + problem.cost(node.state, action, state)
+            stored = table.lookup(child_key)
+            if stored is not None and stored <= cost:
+                continue
+            h = problem.heuristic(state)
+            if h == INF:  # không gán được box nào đó vào target: nhánh chết
+                continue
+            child = SearchNode(state=state, parent=node, action=action, cost=cost, depth=node.depth + 1)
+            heapq.heappush(fringe, (priority(child, h), next(tie), child, child_key))
+    return None
+
+
+def astar_tt(problem, table=None, hasher=None):
+    return _search(problem, lambda node, h: node.cost + h, table, hasher)
+
+
+def greedy_tt(problem, table=None, hasher=None):
+    return _search(problem, lambda node, h: h, table, hasher)
+
+
+def uniform_cost_tt(problem, table=None, hasher=None):
+    return _search(problem, lambda node, h: node.cost, table, hasher)
+
+
+# IDA* over CompactPushProblem: depth-first with an f = g + h bound that grows each
+# iteration, so memory stays at the current path plus a small transposition table
+# (cleared every iteration) that cuts repeated subtrees and cycles.
+# Children are tried in order of increasing heuristic (pushes toward the goals first).
+# Returns the list of push actions or None.
+# If `stats` is given, the table counters summed over all iterations are written to it.
+def ida_star(problem, memory=1024 * 1024, hasher=None, stats=None):
+    hasher = hasher if hasher is not None else ZobristHasher(problem)
+    root = problem.initial_state
+    root_key = hasher.hash(root)
+    path = []
+    found = object()
+
+    # Mở một node: trả về f nếu vượt bound, `found` nếu là goal, INF nếu đã gặp,
+    # ngược lại một frame [state, g, các con đã sắp xếp, con kế tiếp, f nhỏ nhất vượt bound]
+    def open_node(state, key, g, h, bound, table):
+        f = g + h
+        if f > bound:
+            return f
+        if problem.is_goal(state):
+            return found
+        if table.seen(key, g):
+            return INF
+        children = []
+        for action in problem.actions(state):
+            child = problem.result(state, action)
+            child_h = problem.heuristic(child)
+            if child_h != INF:
+                children.append((child_h, action, child, hasher.update(key, state, action, child)))
+        children.sort(key=lambda item: item[0])
+        return [state, g, children, 0, INF]
+
+    # Một vòng depth-first với stack tường minh (không đệ quy, lời giải dài bao nhiêu cũng được).
+    # Trả về `found` (path chứa lời giải) hoặc bound cho vòng sau
+    def search(h, bound, table):
+        top = open_node(root, root_key, 0, h, bound, table)
+        if type(top) is not list:
+            return top
+        stack = [top]
+        while stack:
+            frame = stack[-1]
+            state, g, children, i, _ = frame
+            if i == len(children):
+                stack.pop()
+                if not stack:
+                    return frame[4]
+                path.pop()
+                stack[-1][4] = min(stack[-1][4], frame[4])
+                continue
+            frame[3] = i + 1
+            child_h, action, child, child_key = children[i]
+            path.append(action)
+            t = open_node(child, child_key, g + problem.cost(state, action, child), child_h, bound, table)
+            if t is found:
+                return found
+            if type(t) is list:
+                stack.append(t)
+                continue
+            path.pop()
+            frame[4] = min(frame[4], t)
+        return INF
+
+    h = problem.heuristic(root)
+    bound = h
+    iterations = 0
+    try:
+        while bound != INF:
+            table = TranspositionTable(memory, "always")
+            iterations += 1
+            try:
+                t = search(h, bound, table)
+            finally:
+                if stats is not None:
+                    for name, value in table.stats().items():
+                        # Kích thước và số ô đã dùng lấy lớn nhất, các bộ đếm cộng dồn qua các vòng
+                        stats[name] = max(stats.get(name, 0), value) if name in ["size", "used"] else stats.get(name, 0) + value
+            if t is found:
+                return path
+            bound = t
+        return None
+    finally:
+        if stats is not None:
+            stats["iterations"] = iterations
@@ -0,0 +1,144 @@
+from collections import OrderedDict, deque
+
+INF = float("inf")
+BIG = 10 ** 6  # cost of a box/goal pair that can never be matched
+
+
+# Minimum number of pushes to bring a box from every cell to `goal`, ignoring the
+# other boxes. BFS of "pulls" from the goal, so walls and the room the player needs
+# behind the box are both taken into account.
+# lines(cell) yields (next cell, cell after it) for every direction.
+def push_distances(goal, floor, lines):
+    distances = {goal: 0}
+    queue = deque([goal])
+    while queue:
+        cell = queue.popleft()
+        for box, player in lines(cell):
+            if box not in distances and box in floor and player in floor:
+                distances[box] = distances[cell] + 1
+                queue.append(box)
+    return distances
+
+
+class _Matching:
+    __slots__ = ("cells", "u", "v", "p", "total")
+
+    def __init__(self, cells, u, v, p, total):
+        self.cells = cells
+        self.u = u
+        self.v = v
+        self.p = p
+        self.total = total
+
+
+# Admissible lower bound: minimum-cost assignment of boxes to goals using the
+# wall-aware push distances above (Hungarian algorithm, rows = boxes, cols = goals).
+# Matchings are cached per box configuration; when a state differs from a cached one
+# by a single push only that box's row is re-augmented (O(n^2) instead of O(n^3)).
+class MatchingHeuristic:
+    def __init__(self, goals, floor, lines, cache_size=50000):
+        self.goals = list(goals)
+        self.size = len(self.goals)
+        tables = [push_distances(goal, floor, lines) for goal in self.goals]
+        # Hàng cost (đánh số từ 1) của một box đặt tại mỗi ô
+        self.rows = {cell: [0] + [table.get(cell, BIG) for table in tables] for cell in floor}
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+
+    # Ô ngoài vùng sàn của player (vd. box nằm sẵn trên goal trong một hốc kín) không có hàng
+    # tính sẵn: box ở đó không đẩy được, chỉ khớp với goal nó đang nằm trên, các goal khác là BIG
+    def _row(self, cell):
+        row = self.rows.get(cell)
+        if row is None:
+            row = [0] + [0 if goal == cell else BIG for goal in self.goals]
+            self.rows[cell] = row
+        return row
+
+    def _augment(self, i, rows, u, v, p):
+        m = self.size
+        minv = [INF] * (m + 1)
+        used = [False] * (m + 1)
+        way = [0] * (m + 1)
+        p[0] = i
+        j0 = 0
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            row = rows[i0]
+            ui0 = u[i0]
+            delta = INF
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j] - ui0 - v[j]
+                    if cur < minv[j]:
+                        minv[j] = cur
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    def _total(self, rows, p):
+        total = sum(rows[p[j]][j] for j in range(1, self.size + 1) if p[j])
+        return INF if total >= BIG else total
+
+    def _remember(self, key, matching):
+        self.cache[key] = matching
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return matching.total
+
+    # Lower bound cho cấu hình box `cells` (key: giá trị hashable đại diện cho cấu hình đó)
+    def evaluate(self, key, cells):
+        matching = self.cache.get(key)
+        if matching is not None:
+            self.cache.move_to_end(key)
+            return matching.total
+        cells = list(cells)
+        if len(cells) > self.size:
+            return INF
+        rows = [None] + [self._row(cell) for cell in cells]
+        u = [0] * (len(cells) + 1)
+        v = [0] * (self.size + 1)
+        p = [0] * (self.size + 1)
+        for i in range(1, len(cells) + 1):
+            self._augment(i, rows, u, v, p)
+        return self._remember(key, _Matching(cells, u, v, p, self._total(rows, p)))
+
+    # Như evaluate, nhưng dùng lại matching của cấu hình cha khi chỉ một box vừa bị đẩy từ box -> target
+    def after_push(self, parent_key, box, target, key, cells):
+        matching = self.cache.get(key)
+        parent = self.cache.get(parent_key)
+        if matching is not None or parent is None or len(parent.cells) != self.size:
+            return self.evaluate(key, cells)
+        cells = list(parent.cells)
+        i = cells.index(box) + 1
+        cells[i - 1] = target
+        rows = [None] + [self._row(cell) for cell in cells]
+        u = parent.u[:]
+        v = parent.v[:]
+        p = parent.p[:]
+        p[p.index(i, 1)] = 0
+        u[i] = 0
+        self._augment(i, rows, u, v, p)
+        return self._remember(key, _Matching(cells, u, v, p, self._total(rows, p)))
+
+    # Lower bound cho state vừa sinh ra: `last` = (parent_key, box, target, key) của lần đẩy
+    # gần nhất (hoặc None); nếu lần đẩy đó tạo ra đúng cấu hình `key` thì cập nhật tăng dần
+    def estimate(self, last, key, cells):
+        if last is not None and last[3] == key:
+            return self.after_push(last[0], last[1], last[2], key, cells)
+        return self.evaluate(key, cells)
@@ -0,0 +1,327 @@
+import glob
+import mmap
+import os
+import re
+from collections import deque
+
+from deadlock import FreezeDetector, compute_dead_squares
+from macros import GoalRooms
+
+# Path to levels
+LEVEL_PATH = "../Sokoban/levels/"
+# Thư mục levels đi kèm repo, mặc định cho các công cụ headless (batch_solve, verify, benchmark)
+DEFAULT_LEVELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "levels")
+
+
+MOVES = {"U": (-1, 0), "D": (1, 0), "L": (0, -1), "R": (0, 1)}
+
+
+# Chỉ mục tĩnh của một level, tạo một lần khi load và không đổi sau đó.
+# Ô được đánh số phẳng index = x * width + y (width = dòng dài nhất + 1, cột đệm
+# để các phép shift trên bitmask không tràn sang hàng kế), giống CompactPushProblem.
+class LevelIndex:
+    def __init__(self, data, player):
+        self.height = len(data)
+        self.width = max(len(row) for row in data) + 1
+        self.offsets = {action: dx * self.width + dy for action, (dx, dy) in MOVES.items()}
+
+        walls = 0
+        goals = []
+        for x, row in enumerate(data):
+            for y, cell in enumerate(row):
+                if cell == "#":
+                    walls |= 1 << self.to_index(x, y)
+                if cell in [".", "*", "+"]:
+                    goals.append(self.to_index(x, y))
+        self.walls = walls
+        self.goals = frozenset(goals)
+        self.goal_mask = sum(1 << goal for goal in goals)
+
+        # Các ô sàn bên trong tường: đi tới được từ player khi bỏ qua box
+        start = self.to_index(*player)
+        seen = {start}
+        stack = [start]
+        while stack:
+            index = stack.pop()
+            for offset in self.offsets.values():
+                nxt = index + offset
+                if nxt not in seen and 0 <= nxt < self.height * self.width and not walls >> nxt & 1:
+                    seen.add(nxt)
+                    stack.append(nxt)
+        self.cells = tuple(sorted(seen))
+        self.number = {index: i for i, index in enumerate(self.cells)}
+        self.floor = sum(1 << index for index in self.cells)
+        # Bảng hàng xóm: ô sàn -> các (hướng, ô sàn kề)
+        self.neighbors = {
+            index: tuple((action, index + offset) for action, offset in self.offsets.items() if (index + offset) in self.number)
+            for index in self.cells
+        }
+
+    def to_index(self, x, y):
+        return x * self.width + y
+
+    def to_cell(self, index):
+        return divmod(index, self.width)
+
+    # Đường đi ngắn nhất của player từ start tới end (ô phẳng), không đi qua ô nào trong `boxes`
+    def walk(self, start, end, boxes):
+        if start == end:
+            return ""
+        parents = {start: None}
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            for action, nxt in self.neighbors[index]:
+                if nxt in parents or nxt in boxes:
+                    continue
+                parents[nxt] = (index, action)
+                if nxt == end:
+                    steps = []
+                    while parents[nxt] is not None:
+                        nxt, step = parents[nxt]
+                        steps.append(step)
+                    return "".join(reversed(steps))
+                queue.append(nxt)
+        return None
+
+    # Dựng lại chuỗi U/D/L/R từ các lần đẩy (ô box, chuỗi hướng đẩy), bắt đầu từ player và boxes (ô phẳng).
+    # Macro được tách lại thành từng lần đẩy, player đi vòng tới sau box trước mỗi lần
+    def push_moves(self, player, boxes, pushes):
+        boxes = set(boxes)
+        result = []
+        for box, path in pushes:
+            for direction in path:
+                offset = self.offsets[direction]
+                result.append(self.walk(player, box - offset, boxes))
+                result.append(direction)
+                boxes.remove(box)
+                boxes.add(box + offset)
+                player = box
+                box += offset
+        return "".join(result)
+
+
+# Manage levels
+class Level:
+    def __init__(self, level_number, data=None):
+        self.number = level_number
+        if data is None:
+            data = self.load_level(f"level{level_number}.txt")
+        self.data = [list(row) for row in data]
+
+        # Vị trí player và box hiện tại, game cập nhật khi di chuyển (xem move_player/move_box)
+        self.player = None
+        self.boxes = set()
+        for x, row in enumerate(self.data):
+            for y, cell in enumerate(row):
+                if cell in ["@", "+"]:
+                    self.player = (x, y)
+                elif cell in ["$", "*"]:
+                    self.boxes.add((x, y))
+        self.index = LevelIndex(self.data, self.player)
+        self.targets = sorted(self.index.to_cell(goal) for goal in self.index.goals)
+
+        # Tính trước các ô deadlock một lần khi load level
+        self.dead_squares = compute_dead_squares(self.data)
+        # Bảng các cụm box bị freeze đã biết, dùng chung cho game và solver trên level này
+        self.freeze_deadlocks = FreezeDetector(self.data, self.dead_squares)
+        # Các phòng goal có một lối vào, dùng cho macro đẩy vào phòng (xem MacroMoves)
+        self.goal_rooms = GoalRooms(self.index, self.index.goals)
+
+    def move_player(self, cell):
+        self.player = cell
+
+    def move_box(self, old, new):
+        self.boxes.remove(old)
+        self.boxes.add(new)
+
+    def load_level(self, level_number):
+        with open(LEVEL_PATH + level_number, "r") as file:
+            level_data = file.readlines()
+        # Loại bỏ ký tự xuống dòng và giữ nguyên khoảng trắng
+        return [list(line.rstrip('\n')) for line in level_data]
+
+
+# Các ký tự được phép trên một dòng board (XSB/SOK). SOK còn dùng "-"/"_" cho sàn,
+# chữ thường p/b cho player/box, số đếm lặp (run-length) và "|" để ngăn dòng.
+BOARD_CHARS = frozenset(b"#@+$*. -_pPbB0123456789|")
+# Đổi ký hiệu SOK về ký hiệu game dùng
+SYMBOLS = {"-": " ", "_": " ", "p": "@", "P": "+", "b": "$", "B": "*"}
+# Dòng metadata kiểu "Author: ...", "Comment: ..."
+METADATA = re.compile(r"[A-Za-z][\w .-]*:")
+
+
+def is_board_line(line):
+    stripped = line.strip()
+    return bool(stripped) and b"#" in stripped and all(char in BOARD_CHARS for char in stripped)
+
+
+# Giải nén một dòng SOK như "3#-2$" và tách các dòng nối bằng "|"
+def parse_board(lines):
+    rows = []
+    for line in lines:
+        for part in line.split("|"):
+            if not part:
+                continue
+            row = []
+            count = ""
+            for char in part:
+                if char.isdigit():
+                    count += char
+                    continue
+                row.append(SYMBOLS.get(char, char) * int(count or 1))
+                count = ""
+            rows.append("".join(row))
+    return rows
+
+
+# Một file pack chứa nhiều level (XSB/SOK, có title và comment). File được mmap và
+# chỉ quét tới level cần lấy; offset của mỗi level được lưu lại nên nhảy tới level N
+# lần sau không phải đọc lại file. Chỉ lưu offset, không giữ level nào trong bộ nhớ.
+class LevelPack:
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.size = size
+        self.offsets = []    # (start, end, title) của từng level đã quét
+        self.pos = 0         # vị trí quét tiếp theo trong file
+        self.current = None  # level đang đọc dở: [start, end, title, title có từ "Title:" không]
+        self.pending_title = None  # "Title:" đọc được trước board kế tiếp
+        self.comment = None  # dòng text gần nhất trước board, làm title nếu không có "Title:"
+
+    # Quét tiếp cho tới khi biết offset của level `upto` (None: tới hết file).
+    # Một level kết thúc ở dòng trống (hoặc board kế tiếp, hết file) sau board của nó, nên "Title:"
+    # nằm ngay sau board vẫn thuộc về level đó, còn "Title:" sau dòng trống thuộc về board kế tiếp.
+    def _scan(self, upto=None):
+        data = self.data
+        while self.pos < self.size and (upto is None or len(self.offsets) <= upto):
+            start = self.pos
+            end = data.find(b"\n", start)
+            end = self.size if end < 0 else end + 1
+            line = data[start:end]
+            self.pos = end
+            if is_board_line(line):
+                if self.current is not None and self.current[1] < start:
+                    self._finish()
+                if self.current is None:
+                    self.current = [start, end, self.pending_title or self.comment, self.pending_title is not None]
+                    self.pending_title = None
+                    self.comment = None
+                else:
+                    self.current[1] = end
+                continue
+            if not line.strip():
+                if self.current is not None:
+                    self._finish()
+                continue
+            text = line.strip().lstrip(b";").strip().decode("utf-8", "replace")
+            if not text:
+                continue
+            if text.lower().startswith("title:"):
+                title = text[6:].strip()
+                # Level đang mở đã có title đặt trước board thì title này là của board kế tiếp
+                if self.current is not None and not self.current[3]:
+                    self.current[2] = title
+                    self.current[3] = True
+                else:
+                    if self.current is not None:
+                        self._finish()
+                    self.pending_title = title
+            elif METADATA.match(text):
+                # Author:, Comment:, ... không dùng làm title
+                continue
+            elif self.current is None:
+                self.comment = text
+        if self.pos >= self.size and self.current is not None:
+            self._finish()
+
+    def _finish(self):
+        self.offsets.append(tuple(self.current[:3]))
+        self.current = None
+
+    def __len__(self):
+        self._scan()
+        return len(self.offsets)
+
+    # Trả về level thứ n dưới dạng list các dòng
+    def __getitem__(self, n):
+        if n < 0:
+            n += len(self)
+        self._scan(n)
+        if not 0 <= n < len(self.offsets):
+            raise IndexError(n)
+        start, end, _ = self.offsets[n]
+        lines = self.data[start:end].decode("utf-8", "replace").splitlines()
+        return parse_board(line.rstrip() for line in lines)
+
+    def title(self, n):
+        self._scan(n)
+        return self.offsets[n][2] or f"{os.path.basename(self.path)} #{n + 1}"
+
+    def __iter__(self):
+        n = 0
+        while True:
+            try:
+                yield self[n]
+            except IndexError:
+                return
+            n += 1
+
+    def close(self):
+        if self.size:
+            self.data.close()
+        self.file.close()
+
+
+# Thư mục các file levelN.txt (mỗi file một level), cùng giao diện với LevelPack
+class LevelFolder:
+    def __init__(self, path):
+        self.path = path
+        names = [name for name in os.listdir(path) if re.fullmatch(r"level\d+\.txt", name)]
+        self.files = sorted(names, key=lambda name: int(re.findall(r"\d+", name)[0]))
+
+    def __len__(self):
+        return len(self.files)
+
+    def __getitem__(self, n):
+        with open(os.path.join(self.path, self.files[n]), "r") as file:
+            return [line.rstrip("\n") for line in file]
+
+    def title(self, n):
+        return self.files[n]
+
+    def __iter__(self):
+        return (self[n] for n in range(len(self)))
+
+    def close(self):
+        pass
+
+
+# Mở một thư mục levelN.txt hoặc một file pack nhiều level
+def open_levels(path):
+    if os.path.isdir(path):
+        return LevelFolder(path)
+    return LevelPack(path)
+
+
+# Sinh lần lượt (tên level, các dòng của level) từ các thư mục levelN.txt, file pack nhiều level
+# hoặc glob pattern. Level trong thư mục mang tên file, level trong pack tên "file:thứ tự"
+# (chỉ tên file nếu pack có một level). File pack được đọc dần qua LevelPack.
+def collect_levels(paths):
+    for path in paths:
+        for name in [path] if os.path.isdir(path) else sorted(glob.glob(path)) or [path]:
+            levels = open_levels(name)
+            try:
+                folder = isinstance(levels, LevelFolder)
+                single = not folder and len(levels) == 1
+                for n, rows in enumerate(levels):
+                    if folder:
+                        yield levels.title(n), rows
+                    elif single:
+                        yield os.path.basename(name), rows
+                    else:
+                        yield f"{os.path.basename(name)}:{n}", rows
+            finally:
+                levels.close()
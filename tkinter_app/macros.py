@@ -0,0 +1,193 @@
+from collections import deque
+
+
+# Các phòng chứa mọi goal và chỉ nối với phần còn lại qua đúng một ô (entrance).
+# Entrance là articulation point của đồ thị các ô sàn, tìm bằng một lần DFS (Tarjan) gốc tại
+# một goal, O(số ô). Phòng là thành phần chứa gốc khi bỏ entrance: mọi ô trừ entrance và các
+# cây con DFS tách rời khỏi nó, nên chỉ cần lưu các cây con đó dưới dạng khoảng thứ tự DFS.
+# Chỉ phụ thuộc vào sàn và goals, tính một lần cho mỗi level (xem Level.goal_rooms).
+class GoalRooms:
+    def __init__(self, index, goals):
+        goals = frozenset(goals)
+        self.order = {}       # ô sàn -> thứ tự DFS
+        self.candidates = []  # (số ô của phòng, entrance, các khoảng [đầu, cuối) thứ tự DFS ngoài phòng)
+        # Goal nằm ngoài vùng sàn của player (hốc kín) thì không có phòng goal nào để đẩy vào
+        if not goals or not all(goal in index.number for goal in goals):
+            return
+        root = min(goals)
+        order = self.order
+        order[root] = 0
+        low = {root: 0}
+        parent = {root: None}
+        size = {}
+        separated = {}
+        stack = [(root, iter(index.neighbors[root]))]
+        while stack:
+            cell, neighbors = stack[-1]
+            for _, nxt in neighbors:
+                if nxt not in order:
+                    order[nxt] = low[nxt] = len(order)
+                    parent[nxt] = cell
+                    stack.append((nxt, iter(index.neighbors[nxt])))
+                    break
+                if nxt != parent[cell]:
+                    low[cell] = min(low[cell], order[nxt])
+            else:
+                stack.pop()
+                size[cell] = len(order) - order[cell]
+                up = parent[cell]
+                if up is not None:
+                    low[up] = min(low[up], low[cell])
+                    # Cây con của cell chỉ nối với phần còn lại qua up
+                    if low[cell] >= order[up] and up != root:
+                        separated.setdefault(up, []).append(cell)
+        goal_orders = [order[goal] for goal in goals]
+        for entrance, children in separated.items():
+            if entrance in goals:
+                continue
+            ranges = [(order[child], order[child] + size[child]) for child in children]
+            if any(start <= goal < end for goal in goal_orders for start, end in ranges):
+                continue
+            room_size = len(order) - 1 - sum(end - start for start, end in ranges)
+            self.candidates.append((room_size, entrance, ranges))
+        self.candidates.sort(key=lambda candidate: candidate[:2])
+
+    # Phòng nhỏ nhất không chứa player và box nào (box được đứng trên entrance).
+    # Trả về (các ô của phòng, entrance) hoặc (frozenset(), None)
+    def find(self, player, boxes):
+        order = self.order
+        for _, entrance, ranges in self.candidates:
+            def in_room(cell):
+                position = order.get(cell)
+                return (position is not None and cell != entrance
+                        and not any(start <= position < end for start, end in ranges))
+            if player == entrance or in_room(player) or any(in_room(box) for box in boxes):
+                continue
+            return frozenset(cell for cell in order if in_room(cell)), entrance
+        return frozenset(), None
+
+
+# Macro moves for the push-level problems: one search edge made of several pushes
+# of the same box, written as a string of push directions ("RRR", "RRDD", ...).
+#
+# Tunnel macro: a box pushed into a one-wide corridor, with the player following it
+# into the corridor, can only ever leave it by being pushed on, so it is pushed
+# until it leaves the corridor, reaches a goal or is blocked.
+# Goal-room macro: when every goal lies in one room whose only way in is a single
+# entrance cell, a box pushed onto the entrance is pushed straight to the next free
+# goal of the room, filling the goals farthest from the entrance first.
+#
+# Cells are flat indexes of LevelIndex (x * width + y).
+class MacroMoves:
+    def __init__(self, level, live, goals):
+        index = level.index
+        self.index = index
+        self.live = live
+        self.offsets = index.offsets
+        self.directions = {offset: action for action, offset in index.offsets.items()}
+        self.goals = frozenset(goals)
+
+        # (ô box sau khi đẩy, offset) mà tại đó box và player đều kẹp giữa hai wall
+        self.tunnels = set()
+        for cell in index.cells:
+            for offset in index.offsets.values():
+                if cell in self.goals or cell - offset not in index.number:
+                    continue
+                if self._corridor(cell, offset) and self._corridor(cell - offset, offset):
+                    self.tunnels.add((cell, offset))
+
+        self.room, self.entrance, self.fill_order = self._goal_room(level)
+        self.room_mask = sum(1 << cell for cell in self.room)
+        if self.entrance is not None:
+            self.room_mask |= 1 << self.entrance
+
+    # Ô cell có wall ở cả hai bên vuông góc với hướng offset
+    def _corridor(self, cell, offset):
+        side = self.index.width if abs(offset) == 1 else 1
+        walls = self.index.walls
+        return bool(walls >> (cell - side) & 1 and walls >> (cell + side) & 1)
+
+    # Phòng goal của level (tính sẵn trên Level.goal_rooms khi goals là goal của level) cho vị trí
+    # player/box hiện tại. Trả về (các ô của phòng, entrance, thứ tự lấp goal) hoặc (frozenset(), None, ())
+    def _goal_room(self, level):
+        index = self.index
+        rooms = level.goal_rooms if self.goals == index.goals else GoalRooms(index, self.goals)
+        room, entrance = rooms.find(index.to_index(*level.player), [index.to_index(*box) for box in level.boxes])
+        if entrance is None:
+            return frozenset(), None, ()
+        # Goal xa entrance nhất được lấp trước để không chặn đường vào các goal khác
+        distance = {entrance: 0}
+        queue = deque([entrance])
+        while queue:
+            cell = queue.popleft()
+            for _, nxt in index.neighbors[cell]:
+                if nxt in room and nxt not in distance:
+                    distance[nxt] = distance[cell] + 1
+                    queue.append(nxt)
+        order = sorted(self.goals, key=lambda goal: (-distance.get(goal, 0), goal))
+        return frozenset(room), entrance, tuple(order)
+
+    def reachable(self, player, free):
+        width = self.index.width
+        reach = 1 << player
+        while True:
+            grown = (reach | reach << 1 | reach >> 1 | reach << width | reach >> width) & free
+            if grown == reach:
+                return reach
+            reach = grown
+
+    # Box vừa được đẩy từ `box` tới `target`; others: bitmask các box còn lại.
+    # Trả về chuỗi hướng đẩy của macro (gồm cả lần đẩy đầu), hoặc None nếu chỉ là một lần đẩy thường
+    def expand(self, box, target, others):
+        offset = target - box
+        if target == self.entrance and target + offset in self.room:
+            return self._into_room(box, target, others)
+        if (target, offset) not in self.tunnels:
+            return None
+        direction = self.directions[offset]
+        path = direction
+        while (target, offset) in self.tunnels:
+            nxt = target + offset
+            if not self.live >> nxt & 1 or others >> nxt & 1:
+                break
+            target = nxt
+            path += direction
+        return path if len(path) > 1 else None
+
+    # Đẩy box từ entrance tới goal trống đầu tiên theo fill_order (BFS trên các lần đẩy,
+    # box chỉ đi trong phòng, các box khác đứng yên)
+    def _into_room(self, box, entrance, others):
+        goal = next((goal for goal in self.fill_order if not others >> goal & 1), None)
+        if goal is None:
+            return None
+        free = self.index.floor & ~others
+        first = self.directions[entrance - box]
+        start = (entrance, box)
+        parents = {(entrance, self._rep(box, free & ~(1 << entrance))): None}
+        queue = deque([start])
+        while queue:
+            cell, player = queue.popleft()
+            if cell == goal:
+                path = []
+                key = (cell, self._rep(player, free & ~(1 << cell)))
+                while parents[key] is not None:
+                    key, step = parents[key]
+                    path.append(step)
+                return first + "".join(reversed(path))
+            reach = self.reachable(player, free & ~(1 << cell))
+            for offset in self.offsets.values():
+                nxt = cell + offset
+                if not reach >> (cell - offset) & 1 or not self.room_mask >> nxt & 1:
+                    continue
+                if not self.live >> nxt & 1 or others >> nxt & 1:
+                    continue
+                key = (nxt, self._rep(cell, free & ~(1 << nxt)))
+                if key in parents:
+                    continue
+                parents[key] = ((cell, self._rep(player, free & ~(1 << cell))), self.directions[offset])
+                queue.append((nxt, cell))
+        return None
+
+    def _rep(self, player, free):
+        reach = self.reachable(player, free)
+        return (reach & -reach).bit_length() - 1
@@ -0,0 +1,163 @@
+# Đo xem search tốn thời gian ở đâu: số lần gọi và thời gian của từng hook của
+# problem, phân bố giá trị heuristic, và kích thước frontier/closed theo thời gian.
+#
+#   python profiler.py ../levels/level9.txt -a astar,astar_tt -o report.json --folded stacks.folded
+#   flamegraph.pl stacks.folded > search.svg
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+
+from heuristic import INF
+from level import Level, collect_levels
+from solver import ALGORITHMS, solve
+
+# Các hook của problem được đo (pull_* chỉ có ở problem dùng cho search ngược)
+HOOKS = ("actions", "result", "cost", "heuristic", "is_goal", "pull_actions", "pull_result")
+
+
+# Gắn vào một problem (attach) trước khi search, đọc report() sau khi search xong.
+# Frontier được ước lượng bằng số state sinh ra (result) trừ số state đã mở rộng (actions),
+# closed là số state khác nhau đã mở rộng; lấy mẫu mỗi `sample_interval` giây.
+class SearchProfiler:
+    def __init__(self, sample_interval=0.05):
+        self.sample_interval = sample_interval
+        self.calls = Counter()
+        self.times = Counter()
+        self.heuristic_values = Counter()
+        self.samples = []
+        self.closed = set()
+        self.expanded = 0
+        self.generated = 0
+        self.started = None
+        self.finished = None
+        self._next_sample = 0
+
+    def attach(self, problem):
+        for name in HOOKS:
+            if hasattr(problem, name):
+                setattr(problem, name, self._wrap(name, getattr(problem, name)))
+
+    def _wrap(self, name, hook):
+        calls = self.calls
+        times = self.times
+        clock = time.perf_counter
+
+        def timed(*args):
+            start = clock()
+            value = hook(*args)
+            times[name] += clock() - start
+            calls[name] += 1
+            return value
+
+        if name in ["actions", "pull_actions"]:
+            def expanding(state):
+                self.expanded += 1
+                self.closed.add(hash(state))
+                if clock() >= self._next_sample:
+                    self.sample()
+                return timed(state)
+            return expanding
+        if name in ["result", "pull_result"]:
+            def generating(state, action):
+                self.generated += 1
+                return timed(state, action)
+            return generating
+        if name == "heuristic":
+            def measuring(state):
+                value = timed(state)
+                self.heuristic_values["inf" if value == INF else value] += 1
+                return value
+            return measuring
+        return timed
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._next_sample = self.started
+        self.finished = None
+
+    def stop(self):
+        self.finished = time.perf_counter()
+        self.sample()
+
+    def sample(self):
+        now = time.perf_counter()
+        self.samples.append({
+            "time": now - self.started,
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "frontier": max(0, self.generated - self.expanded),
+            "closed": len(self.closed),
+        })
+        self._next_sample = now + self.sample_interval
+
+    def report(self):
+        total = (self.finished or time.perf_counter()) - self.started
+        hooks = {name: {"calls": self.calls[name], "time": self.times[name]} for name in HOOKS if self.calls[name]}
+        # Thời gian của search ngoài các hook (fringe, closed set, tạo node...)
+        other = total - sum(self.times.values())
+        values = sorted(self.heuristic_values.items(), key=lambda item: (item[0] == "inf", item[0] if item[0] != "inf" else 0))
+        return {
+            "total_time": total,
+            "search_time": other,
+            "hooks": hooks,
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "closed": len(self.closed),
+            "heuristic": {str(value): count for value, count in values},
+            "samples": self.samples,
+        }
+
+    # Các dòng "stack thời_gian_µs" theo định dạng folded của flamegraph.pl / speedscope
+    def folded(self, prefix="search"):
+        report = self.report()
+        lines = [f"{prefix} {round(max(0, report['search_time']) * 1e6)}"]
+        for name, hook in report["hooks"].items():
+            lines.append(f"{prefix};{name} {round(hook['time'] * 1e6)}")
+        return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile Sokoban searches hook by hook.")
+    parser.add_argument("paths", nargs="+", help="level directories, files (one or many levels) or glob patterns")
+    parser.add_argument("-a", "--algorithms", default="astar", help="comma separated: " + ", ".join(ALGORITHMS))
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between frontier/closed samples")
+    parser.add_argument("-o", "--output", help="JSON report (default: stdout)")
+    parser.add_argument("--folded", help="also write flamegraph folded stacks to this file")
+    args = parser.parse_args(argv)
+
+    algorithms = [name.strip() for name in args.algorithms.split(",") if name.strip()]
+    for name in algorithms:
+        if name not in ALGORITHMS:
+            parser.error(f"unknown algorithm: {name}")
+
+    reports = []
+    stacks = []
+    for name, rows in collect_levels(args.paths):
+        for algorithm in algorithms:
+            profiler = SearchProfiler(args.interval)
+            moves = solve(Level(name, rows), algorithm, profiler=profiler)
+            record = {"level": name, "algorithm": algorithm,
+                      "status": "solved" if moves is not None else "unsolved",
+                      "length": len(moves) if moves is not None else None}
+            record.update(profiler.report())
+            reports.append(record)
+            stacks.extend(profiler.folded(f"{name};{algorithm}"))
+            print(f"{name:<16} {algorithm:<14} {record['status']:<9} time={record['total_time']:.3f}", file=sys.stderr)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        json.dump(reports, out, indent=2)
+        out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if args.folded:
+        with open(args.folded, "w") as file:
+            file.write("\n".join(stacks) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
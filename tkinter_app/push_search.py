@@ -0,0 +1,134 @@
+from collections import deque
+from simpleai.search import SearchProblem
+from heuristic import MatchingHeuristic
+from macros import MacroMoves
+
+MOVES = {"U": (-1, 0), "D": (1, 0), "L": (0, -1), "R": (0, 1)}
+
+
+# Search problem where every successor is one box push.
+# State: (representative of the player's reachable region, sorted tuple of boxes).
+# The player walk between pushes is rebuilt only for the final solution (see moves()).
+# With macros=True tunnel and goal-room pushes of one box (see MacroMoves) are a
+# single action whose direction string holds every push, costing one per push.
+class PushSokobanProblem(SearchProblem):
+    def __init__(self, level, targets=None, macros=True):
+        self.level = level
+        self.dead = level.dead_squares
+        self.freeze = level.freeze_deadlocks
+        index = level.index
+        # Các ô sàn (x, y) lấy từ chỉ mục của level, mọi ô khác coi như wall
+        self.floor = {index.to_cell(cell) for cell in index.cells}
+        self.player = level.player
+        self.goal = tuple(sorted(targets if targets is not None else level.targets))
+        self.targets = set(self.goal)
+        self.boxes = tuple(sorted(level.boxes))
+        self.index = index
+        live = sum(1 << cell for cell in index.cells if not self.dead[cell // index.width][cell % index.width])
+        self.macros = MacroMoves(level, live, [index.to_index(x, y) for x, y in self.goal]) if macros else None
+        self._last_reach = (None, None)
+        self._last_push = None
+        self.matching = MatchingHeuristic(
+            self.goal, self.floor,
+            lambda cell: [((cell[0] + dx, cell[1] + dy), (cell[0] + 2 * dx, cell[1] + 2 * dy)) for dx, dy in MOVES.values()],
+        )
+        self.initial_state = (self.normalize(self.player, self.boxes), self.boxes)
+        super(PushSokobanProblem, self).__init__(initial_state=self.initial_state)
+
+    # Đẩy box từ `box` tới `target` có làm box bị freeze (không thể giải) không
+    def is_freeze_deadlock(self, box, target, box_set):
+        width = self.freeze.width
+
+        def has_box(index):
+            cell = divmod(index, width)
+            return cell == target or (cell != box and cell in box_set)
+
+        return self.freeze.is_deadlock(self.freeze.index(*target), has_box)
+
+    # Tất cả các ô player đi tới được mà không đẩy box
+    def reachable(self, player, boxes):
+        key = (player, boxes)
+        if self._last_reach[0] == key:
+            return self._last_reach[1]
+        box_set = set(boxes)
+        seen = {player}
+        queue = deque([player])
+        while queue:
+            x, y = queue.popleft()
+            for dx, dy in MOVES.values():
+                cell = (x + dx, y + dy)
+                if cell not in seen and cell not in box_set and cell in self.floor:
+                    seen.add(cell)
+                    queue.append(cell)
+        self._last_reach = (key, seen)
+        return seen
+
+    def normalize(self, player, boxes):
+        return min(self.reachable(player, boxes))
+
+    def is_goal(self, state):
+        _, boxes = state
+        return all(box in self.targets for box in boxes)
+
+    # Mỗi action là một lần đẩy: (vị trí box, hướng đẩy),
+    # hoặc một macro: (vị trí box, chuỗi hướng các lần đẩy liên tiếp)
+    def actions(self, state):
+        player, boxes = state
+        reach = self.reachable(player, boxes)
+        box_set = set(boxes)
+        box_mask = None
+        actions = []
+        for box in boxes:
+            bx, by = box
+            for action, (dx, dy) in MOVES.items():
+                if (bx - dx, by - dy) not in reach:
+                    continue
+                new_x, new_y = bx + dx, by + dy
+                # dead_squares cũng đánh dấu wall nên một lần tra là đủ
+                if self.dead[new_x][new_y] or (new_x, new_y) in box_set:
+                    continue
+                if self.macros is not None:
+                    if box_mask is None:
+                        box_mask = sum(1 << self.index.to_index(x, y) for x, y in boxes)
+                    cell = self.index.to_index(bx, by)
+                    path = self.macros.expand(cell, self.index.to_index(new_x, new_y), box_mask ^ (1 << cell))
+                    if path is not None:
+                        action = path
+                        new_x, new_y = self.follow(box, path)
+                if self.is_freeze_deadlock(box, (new_x, new_y), box_set):
+                    continue
+                actions.append((box, action))
+        return actions
+
+    # Vị trí box sau khi đẩy theo chuỗi hướng `path`
+    def follow(self, box, path):
+        x, y = box
+        for direction in path:
+            dx, dy = MOVES[direction]
+            x, y = x + dx, y + dy
+        return (x, y)
+
+    def result(self, state, action):
+        _, boxes = state
+        box, path = action
+        target = self.follow(box, path)
+        new_boxes = tuple(sorted([b for b in boxes if b != box] + [target]))
+        self._last_push = (boxes, box, target, new_boxes)
+        # Sau lần đẩy cuối player đứng ngay sau box
+        dx, dy = MOVES[path[-1]]
+        return (self.normalize((target[0] - dx, target[1] - dy), new_boxes), new_boxes)
+
+    def cost(self, state, action, state2):
+        return len(action[1])
+
+    # Matching box-target theo số lần đẩy (xem MatchingHeuristic.estimate)
+    def heuristic(self, state):
+        return self.matching.estimate(self._last_push, state[1], state[1])
+
+    # Chuyển danh sách push (result.path() hoặc list action) thành chuỗi U/D/L/R để replay
+    def moves(self, pushes):
+        if hasattr(pushes, "path"):
+            pushes = [action for action, _ in pushes.path()[1:]]
+        index = self.index
+        return index.push_moves(index.to_index(*self.player), [index.to_index(x, y) for x, y in self.boxes],
+                                [(index.to_index(x, y), path) for (x, y), path in pushes])
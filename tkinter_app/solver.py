@@ -0,0 +1,238 @@
+import multiprocessing
+import queue
+import time
+from simpleai.search import astar, breadth_first, depth_first, greedy, uniform_cost, iterative_limited_depth_first
+from push_search import PushSokobanProblem
+from bitboard import CompactPushProblem
+from engine import astar_tt, greedy_tt, ida_star, uniform_cost_tt
+from bidirectional import bidirectional
+from transposition import TranspositionTable
+
+
+# Bộ nhớ mặc định (byte) của transposition table cho các thuật toán *_tt và ida_star
+TT_MEMORY = 32 * 1024 * 1024
+IDA_MEMORY = 1024 * 1024
+
+
+# Mọi hàm search đều nhận (problem, tt): tt là dict tuỳ chọn transposition table
+# {"memory": byte, "policy": "shallower"/"always"}, số liệu của bảng được ghi vào tt["stats"]
+def _simpleai(search):
+    def run(problem, tt):
+        return search(problem, graph_search=True)
+    return run
+
+
+def _plain(search):
+    def run(problem, tt):
+        return search(problem)
+    return run
+
+
+def _with_table(search):
+    def run(problem, tt):
+        table = TranspositionTable(tt.get("memory") or TT_MEMORY, tt.get("policy") or "shallower")
+        try:
+            return search(problem, table)
+        finally:
+            tt["stats"] = table.stats()
+    return run
+
+
+def _ida(problem, tt):
+    tt["stats"] = {}
+    return ida_star(problem, tt.get("memory") or IDA_MEMORY, stats=tt["stats"])
+
+
+# Các thuật toán giải, cùng với các nút trên SokobanGame: name -> (problem class, search)
+ALGORITHMS = {
+    "astar": (PushSokobanProblem, _simpleai(astar)),
+    "bfs": (PushSokobanProblem, _simpleai(breadth_first)),
+    "dfs": (PushSokobanProblem, _simpleai(depth_first)),
+    "greedy": (PushSokobanProblem, _simpleai(greedy)),
+    "uniform_cost": (PushSokobanProblem, _simpleai(uniform_cost)),
+    "ids": (PushSokobanProblem, _simpleai(iterative_limited_depth_first)),
+    "astar_tt": (CompactPushProblem, _with_table(astar_tt)),
+    "greedy_tt": (CompactPushProblem, _with_table(greedy_tt)),
+    "uniform_cost_tt": (CompactPushProblem, _with_table(uniform_cost_tt)),
+    "bidirectional": (CompactPushProblem, _plain(bidirectional)),
+    "ida_star": (CompactPushProblem, _ida),
+}
+
+
+# Tên thuật toán "portfolio": chạy song song các thuật toán trong PORTFOLIO (xem solve_portfolio)
+PORTFOLIO = "portfolio"
+PORTFOLIO_ALGORITHMS = ("greedy_tt", "astar_tt", "bidirectional", "ida_star")
+
+
+class SearchCancelled(Exception):
+    pass
+
+
+# Đếm số node được mở rộng (actions) và sinh ra (result). count_closed=True đếm thêm số state
+# khác nhau đã mở rộng: tập hash này lớn dần không giới hạn nên chỉ bật khi đo (benchmark)
+# Nếu có `cancel` (vd. threading.Event) thì dừng search ngay khi nó được set
+def _count_calls(problem, stats, cancel=None, count_closed=False):
+    closed = set() if count_closed else None
+    stats.update(expanded=0, generated=0)
+    if count_closed:
+        stats["closed"] = 0
+
+    def counted_actions(actions):
+        def wrapper(state):
+            if cancel is not None and cancel.is_set():
+                raise SearchCancelled()
+            stats["expanded"] += 1
+            if closed is not None:
+                closed.add(hash(state))
+                stats["closed"] = len(closed)
+            return actions(state)
+        return wrapper
+
+    def counted_result(result):
+        def wrapper(state, action):
+            stats["generated"] += 1
+            return result(state, action)
+        return wrapper
+
+    problem.actions = counted_actions(problem.actions)
+    problem.result = counted_result(problem.result)
+    # Search ngược (bidirectional) mở rộng bằng pull_actions/pull_result
+    if hasattr(problem, "pull_actions"):
+        problem.pull_actions = counted_actions(problem.pull_actions)
+        problem.pull_result = counted_result(problem.pull_result)
+
+
+# Giải một level bằng thuật toán `algorithm`, trả về chuỗi U/D/L/R (None nếu không có lời giải)
+# Nếu truyền dict `stats`, số node expanded/generated (và closed nếu count_closed) được ghi vào đó trong lúc giải
+# (có thể đọc từ thread khác để hiện tiến độ). Set `cancel` để dừng, khi đó raise SearchCancelled
+# Truyền `profiler` (profiler.SearchProfiler) để đo thời gian từng hook của problem
+# tt_memory (byte) và tt_policy chọn transposition table cho *_tt và ida_star; số liệu của bảng
+# (hits, collisions, ...) được ghi vào `stats` với tiền tố "tt_"
+# Bảng freeze deadlock dùng chung trên level, nên `stats` nhận phần tăng thêm trong lần giải này
+# (số pattern học được, số lần pattern chặn state) với tiền tố "freeze_"
+def solve(level, algorithm, targets=None, stats=None, cancel=None, profiler=None, tt_memory=None, tt_policy=None,
+          count_closed=False):
+    if algorithm == PORTFOLIO:
+        return solve_portfolio(level, PORTFOLIO_ALGORITHMS, targets, stats=stats, cancel=cancel,
+                               tt_memory=tt_memory, tt_policy=tt_policy)
+    problem_class, search = ALGORITHMS[algorithm]
+    tt = {"memory": tt_memory, "policy": tt_policy}
+    problem = problem_class(level, targets)
+    freeze = level.freeze_deadlocks.stats()
+    if profiler is not None:
+        profiler.attach(problem)
+    if stats is not None or cancel is not None:
+        _count_calls(problem, stats if stats is not None else {}, cancel, count_closed)
+    if profiler is not None:
+        profiler.start()
+    try:
+        result = search(problem, tt)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        if stats is not None:
+            stats.update(("tt_" + name, value) for name, value in tt.get("stats", {}).items())
+            stats.update(("freeze_" + name, value - freeze[name])
+                         for name, value in level.freeze_deadlocks.stats().items())
+    if result is None:
+        return None
+    return problem.moves(result)
+
+
+# `level` được pickle nguyên vẹn sang process: level.data của game đã bị thay đổi khi chơi
+# (player đứng trên target ghi là "@"), parse lại grid đó sẽ mất goal
+def _portfolio_worker(level, algorithm, targets, results, tt_memory, tt_policy):
+    try:
+        moves = solve(level, algorithm, targets, tt_memory=tt_memory, tt_policy=tt_policy)
+    except Exception as e:
+        results.put((algorithm, "error", str(e)))
+    else:
+        results.put((algorithm, "solved" if moves is not None else "unsolved", moves))
+
+
+# Chạy nhiều thuật toán song song, mỗi thuật toán một process trên cùng level.
+# Mặc định trả về lời giải đầu tiên tìm được; best=True thì đợi mọi thuật toán (hoặc tới
+# `deadline` giây) và lấy lời giải ngắn nhất. Các process còn chạy bị dừng ngay khi có kết quả.
+# stats["running"] là các thuật toán đang chạy, stats["results"] kết quả từng thuật toán,
+# stats["winner"] là thuật toán cho lời giải.
+# Trả về None nếu không thuật toán nào giải được trước deadline.
+def solve_portfolio(level, algorithms=PORTFOLIO_ALGORITHMS, targets=None, deadline=None, best=False,
+                    stats=None, cancel=None, tt_memory=None, tt_policy=None):
+    stats = stats if stats is not None else {}
+    results = multiprocessing.Queue()
+    workers = {
+        algorithm: multiprocessing.Process(target=_portfolio_worker, daemon=True,
+                                           args=(level, algorithm, targets, results, tt_memory, tt_policy))
+        for algorithm in algorithms
+    }
+    for worker in workers.values():
+        worker.start()
+    start = time.perf_counter()
+    found = {}
+    running = set(algorithms)
+    stats.update(running=sorted(running), results={})
+    try:
+        while running:
+            if cancel is not None and cancel.is_set():
+                raise SearchCancelled()
+            if deadline is not None and time.perf_counter() - start >= deadline:
+                break
+            try:
+                algorithm, status, moves = results.get(timeout=0.05)
+            except queue.Empty:
+                # Process chết mà không gửi kết quả (vd. hết bộ nhớ)
+                for algorithm in list(running):
+                    if not workers[algorithm].is_alive() and workers[algorithm].exitcode != 0:
+                        running.discard(algorithm)
+                        stats["results"][algorithm] = "crashed"
+                stats["running"] = sorted(running)
+                continue
+            running.discard(algorithm)
+            stats["running"] = sorted(running)
+            stats["results"][algorithm] = status
+            if status == "solved":
+                found[algorithm] = moves
+                if not best:
+                    break
+    finally:
+        for worker in workers.values():
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+        results.close()
+    stats.pop("running", None)
+    stats["time"] = time.perf_counter() - start
+    if not found:
+        return None
+    winner = min(found, key=lambda algorithm: len(found[algorithm]))
+    stats["winner"] = winner
+    return found[winner]
+
+
+# Như solve nhưng trả về thêm thống kê, dùng cho chạy headless
+def solve_with_stats(level, algorithm, tt_memory=None, tt_policy=None, count_closed=False):
+    stats = {}
+    start = time.perf_counter()
+    moves = solve(level, algorithm, stats=stats, tt_memory=tt_memory, tt_policy=tt_policy, count_closed=count_closed)
+    stats["time"] = time.perf_counter() - start
+    if moves is None:
+        stats["status"] = "unsolved"
+        return stats
+    stats.update(status="solved", moves=moves, length=len(moves), pushes=count_pushes(level, moves))
+    return stats
+
+
+# Đếm số lần đẩy box khi đi theo chuỗi moves
+def count_pushes(level, moves):
+    steps = {"U": (-1, 0), "D": (1, 0), "L": (0, -1), "R": (0, 1)}
+    player = level.player
+    boxes = set(level.boxes)
+    pushes = 0
+    for action in moves:
+        dx, dy = steps[action]
+        player = (player[0] + dx, player[1] + dy)
+        if player in boxes:
+            boxes.remove(player)
+            boxes.add((player[0] + dx, player[1] + dy))
+            pushes += 1
+    return pushes
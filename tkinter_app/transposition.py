@@ -0,0 +1,92 @@
+import random
+from array import array
+from bitboard import bits
+
+
+# 64-bit Zobrist keys for CompactPushProblem states.
+# A push only flips two box keys and swaps the player-region key, so the
+# hash of a child is derived from its parent's hash instead of recomputed.
+class ZobristHasher:
+    def __init__(self, problem, seed=2024):
+        rng = random.Random(seed)
+        cells = problem.height * problem.width
+        self.box = [rng.getrandbits(64) for _ in range(cells)]
+        self.player = [rng.getrandbits(64) for _ in range(cells)]
+
+    def hash(self, state):
+        player, box_mask = state
+        key = self.player[player]
+        for box in bits(box_mask):
+            key ^= self.box[box]
+        return key
+
+    def update(self, key, state, action, new_state):
+        box, target = action[0], action[1]  # macro push có thêm chuỗi hướng đẩy
+        return key ^ self.box[box] ^ self.box[target] ^ self.player[state[0]] ^ self.player[new_state[0]]
+
+
+# Fixed-size transposition table: remembers the lowest cost a state was reached with.
+# Memory is allocated once from the budget (keys and costs in flat arrays), so the
+# closed set of a search never grows past it.
+# policy: "always" overwrites a slot owned by another state,
+#         "shallower" only overwrites it with a state reached at lower or equal cost.
+class TranspositionTable:
+    ENTRY_BYTES = 12  # 8 byte key + 4 byte cost
+
+    def __init__(self, memory=32 * 1024 * 1024, policy="shallower"):
+        if policy not in ["always", "shallower"]:
+            raise ValueError(f"Unknown replacement policy: {policy}")
+        self.policy = policy
+        self.size = max(1, memory // self.ENTRY_BYTES)
+        self.keys = array("Q", [0]) * self.size
+        self.costs = array("i", [0]) * self.size
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.replacements = 0
+
+    # Trả về cost đã lưu của key, hoặc None nếu không có trong bảng
+    def lookup(self, key):
+        key = key or 1  # key 0 đánh dấu ô trống
+        slot = key % self.size
+        if self.keys[slot] == key:
+            self.hits += 1
+            return self.costs[slot]
+        self.misses += 1
+        return None
+
+    def store(self, key, cost):
+        key = key or 1
+        slot = key % self.size
+        stored = self.keys[slot]
+        if stored == 0:
+            self.used += 1
+        elif stored != key:
+            self.collisions += 1
+            if self.policy == "shallower" and self.costs[slot] < cost:
+                return False
+            self.replacements += 1
+        elif self.costs[slot] <= cost:
+            return False
+        self.keys[slot] = key
+        self.costs[slot] = cost
+        return True
+
+    # True nếu state đã được mở rộng với cost nhỏ hơn hoặc bằng, ngược lại ghi nhận nó
+    def seen(self, key, cost):
+        stored = self.lookup(key)
+        if stored is not None and stored <= cost:
+            return True
+        self.store(key, cost)
+        return False
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "used": self.used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "replacements": self.replacements,
+        }
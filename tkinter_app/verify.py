@@ -0,0 +1,138 @@
+# Kiểm tra lời giải không cần UI: đi lại chuỗi moves trên level với tốc độ tối đa.
+#
+#   python batch_solve.py -a astar -o solutions.jsonl
+#   python verify.py solutions.jsonl                    # levels mặc định (../levels)
+#   python verify.py solutions.jsonl pack.sok -o verified.jsonl
+#
+# Mỗi dòng JSON cần "level" (tên như batch_solve ghi ra) và "moves" (LURD, có thể nén run-length).
+import argparse
+import json
+import sys
+import time
+
+from cache import rle_decode, rle_encode
+from level import DEFAULT_LEVELS, MOVES, Level, collect_levels
+
+# Hướng đi -> offset trên chỉ mục phẳng, nhận cả chữ thường (đi) và chữ hoa (đẩy) của LURD
+_DIRECTIONS = {action.lower(): action for action in MOVES}
+_DIRECTIONS.update({action: action for action in MOVES})
+
+
+# Đi lại `moves` từ trạng thái hiện tại của level. Trả về dict:
+#   valid  - mọi bước đều hợp lệ (không đi vào wall, không đẩy box vào wall/box khác)
+#   solved - sau bước cuối mọi box đều nằm trên target
+#   moves, pushes - số bước đi và số lần đẩy (tới bước lỗi nếu không hợp lệ)
+#   error, step - lý do và vị trí bước không hợp lệ đầu tiên
+#   lurd - nếu lurd=True: lời giải dạng LURD chuẩn (chữ thường là đi, chữ hoa là đẩy)
+# Level không bị thay đổi.
+def verify(level, moves, lurd=False):
+    index = level.index
+    offsets = {char: index.offsets[action] for char, action in _DIRECTIONS.items()}
+    floor = index.number
+    goals = index.goals
+    boxes = {index.to_index(x, y) for x, y in level.boxes}
+    on_goal = len(boxes & goals)
+    player = index.to_index(*level.player)
+    pushes = 0
+    steps = [] if lurd else None
+    result = {"valid": True}
+
+    for step, move in enumerate(moves):
+        offset = offsets.get(move)
+        if offset is None:
+            result.update(valid=False, error=f"unknown move {move!r}", step=step)
+            break
+        cell = player + offset
+        if cell in boxes:
+            beyond = cell + offset
+            if beyond in boxes or beyond not in floor:
+                result.update(valid=False, error="box blocked", step=step)
+                break
+            boxes.remove(cell)
+            boxes.add(beyond)
+            on_goal += (beyond in goals) - (cell in goals)
+            pushes += 1
+            if steps is not None:
+                steps.append(move.upper())
+        elif cell not in floor:
+            result.update(valid=False, error="wall", step=step)
+            break
+        elif steps is not None:
+            steps.append(move.lower())
+        player = cell
+
+    result["moves"] = result.get("step", len(moves))
+    result["pushes"] = pushes
+    result["solved"] = result["valid"] and on_goal == len(boxes)
+    if steps is not None:
+        result["lurd"] = "".join(steps)
+    return result
+
+
+# Lời giải dạng LURD nén run-length để lưu trữ, None nếu moves không hợp lệ
+def compress_solution(level, moves):
+    result = verify(level, moves, lurd=True)
+    if not result["valid"]:
+        return None
+    return rle_encode(result["lurd"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify Sokoban solutions headless.")
+    parser.add_argument("solutions", help="JSON lines with level and moves (e.g. batch_solve output)")
+    parser.add_argument("paths", nargs="*", default=[DEFAULT_LEVELS],
+                        help="level directories, files (one or many levels) or glob patterns")
+    parser.add_argument("-o", "--output", help="write the records with verification fields and RLE LURD")
+    args = parser.parse_args(argv)
+
+    levels = dict(collect_levels(args.paths))
+    out = open(args.output, "w") if args.output else None
+    checked = failed = total_moves = 0
+    elapsed = 0.0
+    try:
+        with open(args.solutions) as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("moves") is None:
+                    continue
+                rows = levels.get(record["level"])
+                if rows is None:
+                    print(f"MISSING {record['level']}: level not found", file=sys.stderr)
+                    failed += 1
+                    continue
+                try:
+                    moves = rle_decode(record["moves"])
+                except ValueError as e:
+                    print(f"FAIL {record['level']} {record.get('algorithm', '')}: {e}")
+                    failed += 1
+                    continue
+                level = Level(record["level"], rows)
+                start = time.perf_counter()
+                result = verify(level, moves, lurd=out is not None)
+                elapsed += time.perf_counter() - start
+                checked += 1
+                total_moves += len(moves)
+                if not result["solved"]:
+                    failed += 1
+                    if result["valid"]:
+                        reason = f"not solved after {result['moves']} moves"
+                    else:
+                        reason = f"{result['error']} at move {result['step']}"
+                    print(f"FAIL {record['level']} {record.get('algorithm', '')}: {reason}")
+                if out is not None:
+                    record["lurd"] = rle_encode(result.pop("lurd"))
+                    record["verify"] = result
+                    out.write(json.dumps(record) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+
+    per_move = elapsed / total_moves * 1e6 if total_moves else 0
+    print(f"{checked} solutions checked, {failed} failed ({per_move:.2f} µs/move)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())